@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from app.core.database import Base
 from app.models import job
 from app.models import application_package_db
+from app.models import validation_result
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
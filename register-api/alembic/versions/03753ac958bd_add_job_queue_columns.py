@@ -0,0 +1,37 @@
+"""add job queue columns
+
+Revision ID: 03753ac958bd
+Revises: 682e70ea2e68
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '03753ac958bd'
+down_revision = '682e70ea2e68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('sha256', sa.String(), nullable=True))
+    op.add_column('jobs', sa.Column('docker_image', sa.String(), nullable=True))
+    op.add_column('jobs', sa.Column('worker_id', sa.String(), nullable=True))
+    op.add_column('jobs', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('jobs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    # Workers claim the oldest claimable job, so keep (status, created_at) indexed
+    op.create_index('ix_jobs_status_created_at', 'jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_status_created_at', table_name='jobs')
+    op.drop_column('jobs', 'heartbeat_at')
+    op.drop_column('jobs', 'lease_expires_at')
+    op.drop_column('jobs', 'attempts')
+    op.drop_column('jobs', 'worker_id')
+    op.drop_column('jobs', 'docker_image')
+    op.drop_column('jobs', 'sha256')
@@ -0,0 +1,28 @@
+"""add discovery indexes
+
+Revision ID: 5c2e9a7b41d3
+Revises: db5ed272b61d
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e9a7b41d3'
+down_revision = 'db5ed272b61d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_application_packages_namespace_artifact_name_id', 'application_packages',
+                    ['namespace', 'artifact_name', 'id'], unique=False)
+    op.create_index('ix_application_package_versions_package_published', 'application_package_versions',
+                    ['application_package_id', 'published'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_application_package_versions_package_published', table_name='application_package_versions')
+    op.drop_index('ix_application_packages_namespace_artifact_name_id', table_name='application_packages')
@@ -0,0 +1,65 @@
+"""add package and version unique constraints
+
+Revision ID: 9d41b6e2c8a7
+Revises: 5c2e9a7b41d3
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d41b6e2c8a7'
+down_revision = '5c2e9a7b41d3'
+branch_labels = None
+depends_on = None
+
+
+# Packages duplicated by racing registrations are merged into the oldest one
+DUPLICATE_PACKAGES = """
+    SELECT id, first_value(id) OVER (
+        PARTITION BY namespace, artifact_name ORDER BY created_at, id
+    ) AS keep_id
+    FROM application_packages
+"""
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        UPDATE application_package_versions v SET application_package_id = d.keep_id
+        FROM ({DUPLICATE_PACKAGES}) d
+        WHERE v.application_package_id = d.id AND d.id <> d.keep_id
+    """)
+    op.execute(f"""
+        UPDATE application_package_tags t SET application_package_id = d.keep_id
+        FROM ({DUPLICATE_PACKAGES}) d
+        WHERE t.application_package_id = d.id AND d.id <> d.keep_id
+    """)
+    op.execute(f"""
+        DELETE FROM application_packages p
+        USING ({DUPLICATE_PACKAGES}) d
+        WHERE p.id = d.id AND d.id <> d.keep_id
+    """)
+    # Of duplicated versions keep a published one, otherwise the newest
+    op.execute("""
+        DELETE FROM application_package_versions v
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY application_package_id, artifact_version
+                ORDER BY published DESC NULLS LAST, created_at DESC, id
+            ) AS rank
+            FROM application_package_versions
+        ) d
+        WHERE v.id = d.id AND d.rank > 1
+    """)
+
+    op.create_unique_constraint('uq_application_packages_namespace_artifact_name', 'application_packages',
+                                ['namespace', 'artifact_name'])
+    op.create_unique_constraint('uq_application_package_versions_package_version', 'application_package_versions',
+                                ['application_package_id', 'artifact_version'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_application_package_versions_package_version', 'application_package_versions', type_='unique')
+    op.drop_constraint('uq_application_packages_namespace_artifact_name', 'application_packages', type_='unique')
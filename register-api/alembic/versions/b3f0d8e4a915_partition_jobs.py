@@ -0,0 +1,93 @@
+"""partition jobs by created_at and add jobs_archive
+
+Revision ID: b3f0d8e4a915
+Revises: e7a3c1f95b02
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f0d8e4a915'
+down_revision = 'e7a3c1f95b02'
+branch_labels = None
+depends_on = None
+
+
+JOB_INDEXES = """
+    CREATE INDEX ix_jobs_id ON jobs (id);
+    CREATE INDEX ix_jobs_batch_id ON jobs (batch_id);
+    CREATE INDEX ix_jobs_status_created_at ON jobs (status, created_at);
+"""
+
+
+def upgrade() -> None:
+    # A partitioned table's keys must include the partition key, so jobs.id can
+    # no longer be the target of a foreign key
+    op.drop_constraint('application_packages_job_id_fkey', 'application_packages', type_='foreignkey')
+
+    op.execute("ALTER TABLE jobs RENAME TO jobs_unpartitioned")
+    op.execute("UPDATE jobs_unpartitioned SET created_at = coalesce(updated_at, now()) WHERE created_at IS NULL")
+    op.execute("""
+        CREATE TABLE jobs (
+            LIKE jobs_unpartitioned INCLUDING DEFAULTS,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER TABLE jobs ALTER COLUMN created_at SET NOT NULL")
+
+    # Monthly partitions covering the existing jobs and the next two months;
+    # later months are created by python retention.py
+    op.execute("""
+        DO $$
+        DECLARE
+            month timestamptz := date_trunc('month', coalesce((SELECT min(created_at) FROM jobs_unpartitioned), now()));
+        BEGIN
+            WHILE month <= date_trunc('month', now()) + interval '2 months' LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF jobs FOR VALUES FROM (%L) TO (%L)',
+                               'jobs_' || to_char(month, 'YYYY_MM'), month, month + interval '1 month');
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE jobs_default PARTITION OF jobs DEFAULT")
+
+    op.execute("INSERT INTO jobs SELECT * FROM jobs_unpartitioned")
+    op.execute("DROP TABLE jobs_unpartitioned")
+    op.execute(JOB_INDEXES)
+
+    op.create_table('jobs_archive',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('status', postgresql.ENUM(name='jobstatus', create_type=False), nullable=True),
+        sa.Column('message', sa.String(), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=True),
+        sa.Column('namespace', sa.String(), nullable=True),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('artifact_name', sa.String(), nullable=True),
+        sa.Column('artifact_version', sa.String(), nullable=True),
+        sa.Column('sha256', sa.String(), nullable=True),
+        sa.Column('docker_image', sa.String(), nullable=True),
+        sa.Column('batch_id', sa.String(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_archive_batch_id'), 'jobs_archive', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_jobs_archive_batch_id'), table_name='jobs_archive')
+    op.drop_table('jobs_archive')
+
+    op.execute("ALTER TABLE jobs RENAME TO jobs_partitioned")
+    op.execute("CREATE TABLE jobs (LIKE jobs_partitioned INCLUDING DEFAULTS, PRIMARY KEY (id))")
+    op.execute("INSERT INTO jobs SELECT * FROM jobs_partitioned")
+    op.execute("DROP TABLE jobs_partitioned CASCADE")
+    op.execute(JOB_INDEXES)
+
+    op.execute("UPDATE application_packages SET job_id = NULL WHERE job_id NOT IN (SELECT id FROM jobs)")
+    op.create_foreign_key('application_packages_job_id_fkey', 'application_packages', 'jobs', ['job_id'], ['id'])
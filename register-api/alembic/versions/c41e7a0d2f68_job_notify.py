@@ -0,0 +1,47 @@
+"""notify job_status listeners on job changes
+
+Revision ID: c41e7a0d2f68
+Revises: b3f0d8e4a915
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a0d2f68'
+down_revision = 'b3f0d8e4a915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Wakes API processes waiting on a job (long-poll and SSE), whichever
+    # process wrote the change; see app/services/job_events.py
+    op.execute("""
+        CREATE FUNCTION notify_job_status() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('job_status', NEW.id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER jobs_notify_status
+        AFTER INSERT ON jobs
+        FOR EACH ROW EXECUTE FUNCTION notify_job_status()
+    """)
+    # Lease heartbeats and claims update jobs too, but change nothing a client sees
+    op.execute("""
+        CREATE TRIGGER jobs_notify_status_change
+        AFTER UPDATE ON jobs
+        FOR EACH ROW
+        WHEN ((OLD.status, OLD.message, OLD.progress) IS DISTINCT FROM (NEW.status, NEW.message, NEW.progress))
+        EXECUTE FUNCTION notify_job_status()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER jobs_notify_status_change ON jobs")
+    op.execute("DROP TRIGGER jobs_notify_status ON jobs")
+    op.execute("DROP FUNCTION notify_job_status()")
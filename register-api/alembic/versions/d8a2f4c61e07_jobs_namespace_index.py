@@ -0,0 +1,24 @@
+"""index jobs by namespace and created_at
+
+Revision ID: d8a2f4c61e07
+Revises: c41e7a0d2f68
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a2f4c61e07'
+down_revision = 'c41e7a0d2f68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Bulk job status lookups by namespace and creation window
+    op.create_index('ix_jobs_namespace_created_at', 'jobs', ['namespace', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_namespace_created_at', table_name='jobs')
@@ -0,0 +1,26 @@
+"""add job batch id
+
+Revision ID: db5ed272b61d
+Revises: fd009cfc3419
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'db5ed272b61d'
+down_revision = 'fd009cfc3419'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('batch_id', sa.String(), nullable=True))
+    op.create_index(op.f('ix_jobs_batch_id'), 'jobs', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_jobs_batch_id'), table_name='jobs')
+    op.drop_column('jobs', 'batch_id')
@@ -0,0 +1,26 @@
+"""add sha256 to application_package_versions
+
+Revision ID: e5b9c3d7a214
+Revises: d8a2f4c61e07
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b9c3d7a214'
+down_revision = 'd8a2f4c61e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Versions registered before this revision keep a NULL hash and are
+    # served with a weak ETag until they are registered again
+    op.add_column('application_package_versions', sa.Column('sha256', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('application_package_versions', 'sha256')
@@ -0,0 +1,70 @@
+"""add catalog search
+
+Revision ID: e7a3c1f95b02
+Revises: 9d41b6e2c8a7
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c1f95b02'
+down_revision = '9d41b6e2c8a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('application_package_versions', sa.Column('docker_image', sa.String(), nullable=True))
+
+    # Generated columns, so the search documents are kept up to date on every write.
+    # They are queried by app/services/package_queries.py and not mapped on the models.
+    op.add_column('application_packages', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', coalesce(artifact_name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
+    op.add_column('application_package_versions', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('simple', coalesce(uploader, '')), 'C') || "
+            "setweight(to_tsvector('simple', coalesce(docker_image, '')), 'C')",
+            persisted=True
+        )
+    ))
+
+    op.create_index('ix_application_packages_search_vector', 'application_packages', ['search_vector'],
+                    postgresql_using='gin')
+    op.create_index('ix_application_package_versions_search_vector', 'application_package_versions', ['search_vector'],
+                    postgresql_using='gin')
+    for table, column in (
+        ('application_packages', 'artifact_name'),
+        ('application_packages', 'description'),
+        ('application_package_versions', 'uploader'),
+        ('application_package_versions', 'docker_image'),
+    ):
+        op.create_index(f'ix_{table}_{column}_trgm', table, [column],
+                        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    for table, column in (
+        ('application_package_versions', 'docker_image'),
+        ('application_package_versions', 'uploader'),
+        ('application_packages', 'description'),
+        ('application_packages', 'artifact_name'),
+    ):
+        op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+    op.drop_index('ix_application_package_versions_search_vector', table_name='application_package_versions')
+    op.drop_index('ix_application_packages_search_vector', table_name='application_packages')
+    op.drop_column('application_package_versions', 'search_vector')
+    op.drop_column('application_packages', 'search_vector')
+    op.drop_column('application_package_versions', 'docker_image')
@@ -0,0 +1,34 @@
+"""add validation results cache
+
+Revision ID: fd009cfc3419
+Revises: 03753ac958bd
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fd009cfc3419'
+down_revision = '03753ac958bd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('validation_results',
+    sa.Column('sha256', sa.String(), nullable=False),
+    sa.Column('validator_version', sa.String(), nullable=False),
+    sa.Column('valid', sa.Boolean(), nullable=False),
+    sa.Column('issues', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('sha256', 'validator_version')
+    )
+    op.create_index(op.f('ix_validation_results_last_used_at'), 'validation_results', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_validation_results_last_used_at'), table_name='validation_results')
+    op.drop_table('validation_results')
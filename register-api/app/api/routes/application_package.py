@@ -1,5 +1,6 @@
+import asyncio
 import json
-from typing import Annotated
+from typing import Annotated, List
 import cwl_utils
 import cwl_utils.parser
 from fastapi import APIRouter, Depends, File, UploadFile, BackgroundTasks, HTTPException
@@ -18,17 +19,21 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.job import Job, JobStatus
 
-from app.models.catalog_job import CatalogJobResponse
+from app.models.catalog_job import CatalogBatchResponse, CatalogJobResponse
 from app.models.cwl import CWLUploadRequest
 from app.models.publish import PublishResponse
 
 from ap_validator.app_package import AppPackage
-from app.services import service_factory
+from app.services import service_factory, validation_pool
 from app.services.application_package_service import ApplicationPackageService
+from app.services.base_application_package_service import UploadTooLargeError
+from app.services.cwl_sniffer import CWLSniffError, sniff_cwl
+from app.services.validation_cache import ValidationCache
 from app.services.invenio_application_package_service import ApplicationPackageService as InvenioApplicationPackageService
 
 import app.core.auth.auth as app_auth
-from starlette.status import HTTP_401_UNAUTHORIZED
+from starlette.concurrency import run_in_threadpool
+from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_413_REQUEST_ENTITY_TOO_LARGE
     
 
 router = APIRouter()
@@ -49,11 +54,7 @@ async def register_application_package(
 
     jobId = str(uuid.uuid4())
 
-    # Save the uploaded file
-    content = await request.read()
-    file_path = service.save_uploaded_file(namespace, jobId, content, request.filename)
-    
-    # Check permissions for namespace...
+    # Check permissions for namespace before anything is written to storage...
     # if the namespace is not in the list of groups defined for a user, and it is also NOT the username, they are unauthorized
     # Should be a part of the jwtauth class.
     if not credentials.is_valid_namespace_op(namespace):
@@ -62,25 +63,33 @@ async def register_application_package(
             status_code=HTTP_401_UNAUTHORIZED, detail="Unauthorized- you are not allowed to register to this namespace."
         )
 
-    # Validate the package
-    is_valid, issues = service.validate_package(file_path)
+    # Stream the uploaded file to storage
+    try:
+        file_path, sha256, size = await service.save_uploaded_stream(namespace, jobId, request, request.filename)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    logger.info(f"Stored upload {request.filename} ({size} bytes, sha256={sha256}) for job {jobId}")
+
+    # Load, validate and parse the package once, off the event loop
+    is_valid, issues, parsed = await validate_stored_package(ValidationCache(), file_path, sha256)
     if not is_valid:
         raise HTTPException(status_code=400, detail="Invalid application package: " + json.dumps(issues))
-    
-    # Parse the package
-    artifact_name, artifact_version = service.quick_parse(namespace, jobId, request.filename)
+    artifact_name, artifact_version = parsed.artifact_name, parsed.artifact_version
 
     # Create job record
-    job = service.create_job(jobId, namespace, request.filename, artifact_name, artifact_version)
-    
+    job = service.create_job(jobId, namespace, request.filename, artifact_name, artifact_version,
+                             sha256=sha256, docker_image=parsed.docker_image)
 
-    # Add background task
-    background_tasks.add_task(
-        service.process_application_package,
-        namespace=namespace,
-        filename=request.filename,
-        job_id=job.id
-    )
+    # With the job queue enabled the pending job row is picked up by an ingest worker
+    if not settings.USE_JOB_QUEUE:
+        background_tasks.add_task(
+            service.process_application_package,
+            namespace=namespace,
+            filename=request.filename,
+            job_id=job.id,
+            sha256=sha256,
+            parsed=parsed
+        )
     
     return CatalogJobResponse(
         jobId=job.id,
@@ -88,6 +97,117 @@ async def register_application_package(
         message=f"Registration of {request.filename} initiated. Job ID: {job.id}"
     )
 
+@router.post("/{namespace}/ogc-application-package/batch", response_model=CatalogBatchResponse)
+async def register_application_package_batch(
+    namespace: str,
+    files: List[UploadFile] = File(...),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    token: HTTPAuthorizationCredentials = Depends(security),
+    credentials: JWTAuthorizer = Depends(authorizer),
+    db: Session = Depends(get_db)
+):
+    """
+    Register several application packages at once. Each part is either a CWL
+    file or a zip/tar archive of CWL files. All files are validated in parallel
+    and either all of them are queued, in one transaction, or none are.
+    """
+    service = service_factory.get_application_pacakge_service(db, token.credentials)
+
+    if not credentials.is_valid_namespace_op(namespace):
+        logger.error("User ({}) not in namespace group ({}) or does not match userid.".format(credentials.get_username(), namespace))
+        raise HTTPException(
+            status_code=HTTP_401_UNAUTHORIZED, detail="Unauthorized- you are not allowed to register to this namespace."
+        )
+
+    batchId = str(uuid.uuid4())
+
+    # Stream every CWL file, including archive members, to storage under its own job id
+    stored = []
+    try:
+        for upload in files:
+            if upload.filename.endswith(".cwl"):
+                jobId = str(uuid.uuid4())
+                file_path, sha256, _ = await service.save_uploaded_stream(namespace, jobId, upload, upload.filename)
+                stored.append((jobId, upload.filename, file_path, sha256))
+            else:
+                stored.extend(await run_in_threadpool(service.save_uploaded_archive, namespace, upload))
+            if len(stored) > settings.MAX_BATCH_SIZE:
+                raise ValueError(f"Batch contains more than {settings.MAX_BATCH_SIZE} CWL files")
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not stored:
+        raise HTTPException(status_code=400, detail="No CWL files found in batch")
+
+    validation_cache = ValidationCache()
+    results = await asyncio.gather(*[
+        validate_stored_package(validation_cache, file_path, sha256) for _, _, file_path, sha256 in stored
+    ])
+    invalid = [
+        {"filename": filename, "issues": issues}
+        for (_, filename, _, _), (is_valid, issues, _) in zip(stored, results) if not is_valid
+    ]
+    if invalid:
+        raise HTTPException(status_code=400, detail="Invalid application packages: " + json.dumps(invalid))
+
+    jobs = service.create_jobs([
+        dict(
+            jobId=jobId,
+            namespace=namespace,
+            filename=filename,
+            artifact_name=parsed.artifact_name,
+            artifact_version=parsed.artifact_version,
+            sha256=sha256,
+            docker_image=parsed.docker_image,
+            batch_id=batchId
+        )
+        for (jobId, filename, _, sha256), (_, _, parsed) in zip(stored, results)
+    ])
+
+    if not settings.USE_JOB_QUEUE:
+        for (jobId, filename, _, sha256), (_, _, parsed) in zip(stored, results):
+            background_tasks.add_task(
+                service.process_application_package,
+                namespace=namespace,
+                filename=filename,
+                job_id=jobId,
+                sha256=sha256,
+                parsed=parsed
+            )
+
+    return CatalogBatchResponse(
+        batchId=batchId,
+        status="pending",
+        message=f"Registration of {len(jobs)} application packages initiated. Batch ID: {batchId}",
+        jobs=[CatalogJobResponse(jobId=job.id, status="pending", message=job.filename) for job in jobs]
+    )
+
+async def validate_stored_package(validation_cache: ValidationCache, file_path: str, sha256: str):
+    """Validate a stored upload, reusing an earlier validator result for identical content.
+
+    The upload is sniffed first so malformed files are rejected before any
+    validation is scheduled, and content already known to be valid needs no
+    CWL load at all.
+    """
+    try:
+        sniffed = await run_in_threadpool(sniff_cwl, file_path)
+    except CWLSniffError as e:
+        return False, [str(e)], None
+
+    cached = await run_in_threadpool(validation_cache.get, sha256)
+    if cached is not None:
+        return cached[0], cached[1], sniffed if cached[0] else None
+
+    try:
+        is_valid, issues, parsed = await validation_pool.validate_and_parse(file_path)
+    except validation_pool.PackageLoadError as e:
+        # Failing to load is as deterministic as a validator verdict; pool crashes and other
+        # errors are transient and propagate uncached
+        is_valid, issues, parsed = False, [str(e)], None
+    await run_in_threadpool(validation_cache.put, sha256, is_valid, issues)
+    return is_valid, issues, parsed
+
 @router.get("/{namespace}/{artifactName}", response_model=ApplicationPackageDetails)
 async def get_application_package_details(
     namespace: str,
@@ -97,7 +217,7 @@ async def get_application_package_details(
 
 ):
     service = service_factory.get_application_pacakge_service(db, token.credentials)    
-    package = service.get_package(namespace, artifactName)
+    package = await service.get_package_details_async(namespace, artifactName)
     if not package:
         raise HTTPException(status_code=404, detail="Application package not found")
     return package
@@ -115,14 +235,11 @@ async def get_application_package_details(
     db: Session = Depends(get_db)
 ):
     service = service_factory.get_application_pacakge_service(db, token.credentials)
-    package = service.get_package(namespace, artifactName)
+    package = await service.get_package_details_async(namespace, artifactName, version)
     
     if not package:
-        raise HTTPException(status_code=404, detail="Application package not found")
+        raise HTTPException(status_code=404, detail="Application package version not found")
     
-    apv = service.get_application_package_version(package, version)
-    #apv.application_package = package
-    package.versions.append(apv)
     return package
 
 @router.post("/{namespace}/{artifactName}/{version}/publish", response_model=PublishResponse)
@@ -137,11 +254,11 @@ async def publish_application_package(
     
 
     try:
-        package = service.get_package(namespace, artifactName)
+        package = await service.get_package_async(namespace, artifactName)
         if not package:
             raise ValueError("Application package not found")
 
-        package_version = service.get_application_package_version(package, version)
+        package_version = await service.get_application_package_version_async(package, version)
         if not package_version:
             raise ValueError("Application package version not found")
         
@@ -166,7 +283,16 @@ async def unpublish_application_package(
 ):
     service = service_factory.get_application_pacakge_service(db, token.credentials)
     try:
-        package = service.update_package_publish_status(namespace, artifactName, version, False)
+        package = await service.get_package_async(namespace, artifactName)
+        if not package:
+            raise ValueError("Application package not found")
+
+        package_version = await service.get_application_package_version_async(package, version)
+        if not package_version:
+            raise ValueError("Application package version not found")
+
+        # Also drops this process's cached CWL file resolution of the version
+        package = service.update_package_version_publish_status(package_version, False)
         return PublishResponse(
             namespace=namespace,
             artifactName=artifactName,
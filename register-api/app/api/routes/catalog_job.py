@@ -1,29 +1,141 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
 from fastapi.security import HTTPAuthorizationCredentials
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_async_db
 from app.core.security import security
-from app.models.catalog_job import CatalogJobStatus
-from datetime import datetime
-from sqlalchemy.orm import Session
+from app.models.catalog_job import CatalogBatchStatus, CatalogJobBulkRequest, CatalogJobBulkStatus, CatalogJobStatus
+from app.models.job import JobStatus
+from datetime import timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.job import Job
+from app.services import job_events
+from app.services.async_application_package_service import AsyncApplicationPackageService
 
 router = APIRouter()
 
+# Statuses a job can still change from
+ACTIVE_STATUSES = (JobStatus.PENDING.value, JobStatus.PROCESSING.value)
+
+@router.get("/batch/{batch_id}", response_model=CatalogBatchStatus)
+async def get_batch_status(batch_id: str, db: AsyncSession = Depends(get_async_db)):
+    jobs = await AsyncApplicationPackageService(db).get_batch_jobs(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return CatalogBatchStatus.from_db_jobs(batch_id, jobs)
+
+@router.post("/bulk", response_model=CatalogJobBulkStatus)
+async def get_bulk_job_status(request: CatalogJobBulkRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Status of many jobs at once, by id or by namespace and creation window.
+    Pass the returned asOf as changedSince to get only the jobs changed since.
+    """
+    if (request.jobIds is None) == (request.namespace is None):
+        raise HTTPException(status_code=400, detail="Provide either jobIds or namespace")
+    if request.jobIds is not None:
+        if len(request.jobIds) > settings.JOB_BULK_MAX_JOBS:
+            raise HTTPException(status_code=400, detail=f"At most {settings.JOB_BULK_MAX_JOBS} jobIds are accepted")
+        if request.createdAfter or request.createdBefore:
+            raise HTTPException(status_code=400, detail="createdAfter and createdBefore require namespace")
+
+    service = AsyncApplicationPackageService(db)
+    # Taken from the database clock before the query; the overlap covers changes
+    # committed later with an earlier updated_at, so a job may be returned twice
+    as_of = await service.database_now() - timedelta(seconds=settings.JOB_BULK_AS_OF_OVERLAP_SECONDS)
+    # One extra row tells whether the window holds more jobs than are returned
+    jobs = await service.get_jobs(
+        request.jobIds, request.namespace, request.createdAfter, request.createdBefore,
+        request.changedSince, limit=settings.JOB_BULK_MAX_JOBS + 1
+    )
+    return CatalogJobBulkStatus(
+        jobs=[CatalogJobStatus.from_db_job(job) for job in jobs[:settings.JOB_BULK_MAX_JOBS]],
+        hasMore=len(jobs) > settings.JOB_BULK_MAX_JOBS,
+        asOf=as_of
+    )
+
 @router.get("/{job_id}", response_model=CatalogJobStatus)
-async def get_job_status(job_id: str, db: Session = Depends(get_db)):
-    job = get_job_by_id(db, job_id)
-    if not job:
+async def get_job_status(
+    job_id: str,
+    wait: Optional[str] = Query(None, pattern=r"^\d+(\.\d+)?s?$",
+                                description="Long-poll: hold the request until the job changes or this many seconds pass, e.g. 30s"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    timeout = min(float(wait.rstrip("s")), settings.JOB_WAIT_MAX_SECONDS) if wait else 0
+    # Subscribe before reading so a change between the read and the wait is not missed
+    with job_events.subscribe(job_id) as changed:
+        job = await get_job_by_id(db, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if not timeout or job.status not in ACTIVE_STATUSES:
+            return job
+
+        # Release the connection while waiting; closing also drops the cached row
+        await db.close()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # A notification does not mean a visible change (e.g. a lease heartbeat), so wait until one shows
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                return job
+            changed.clear()
+            latest = await get_job_by_id(db, job_id)
+            if latest and _status_changed(job, latest):
+                return latest
+
+@router.get("/{job_id}/events")
+async def stream_job_status(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job's status. Sends the current status,
+    then every change, and ends once the job is finished.
+    """
+    if not await _read_job(job_id):
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    return StreamingResponse(
+        _job_status_events(job_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _job_status_events(job_id: str, request: Request) -> AsyncIterator[str]:
+    with job_events.subscribe(job_id) as changed:
+        job = await _read_job(job_id)
+        if job:
+            yield _status_event(job)
+        while job and job.status in ACTIVE_STATUSES:
+            try:
+                await asyncio.wait_for(changed.wait(), settings.JOB_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+            changed.clear()
+            latest = await _read_job(job_id)
+            if latest and _status_changed(job, latest):
+                yield _status_event(latest)
+            job = latest
+
+def _status_changed(job: CatalogJobStatus, latest: CatalogJobStatus) -> bool:
+    # Lease heartbeats move updatedAt only
+    return job.model_dump(exclude={"updatedAt"}) != latest.model_dump(exclude={"updatedAt"})
+
+def _status_event(job: CatalogJobStatus) -> str:
+    return f"event: status\ndata: {job.model_dump_json()}\n\n"
+
+async def _read_job(job_id: str) -> Optional[CatalogJobStatus]:
+    # A short-lived session per read, so open streams do not hold connections
+    async with AsyncSessionLocal() as db:
+        return await get_job_by_id(db, job_id)
 
-def get_job_by_id(db: Session, job_id: str) -> Optional[CatalogJobStatus]:
+async def get_job_by_id(db: AsyncSession, job_id: str) -> Optional[CatalogJobStatus]:
     """
     Look up a job by its ID and return it as a CatalogJobStatus
     """
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await AsyncApplicationPackageService(db).get_job(job_id)
     if not job:
         return None
-    return CatalogJobStatus.from_db_job(job) 
\ No newline at end of file
+    return CatalogJobStatus.from_db_job(job)
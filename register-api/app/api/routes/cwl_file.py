@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Response
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi import APIRouter, Depends, File, UploadFile, BackgroundTasks, HTTPException
-from app.core.database import get_db
-from sqlalchemy.orm import Session
-from app.services.application_package_service import ApplicationPackageService
+import mimetypes
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import compression, http_cache
+from app.core.database import get_async_db
+from app.services.async_application_package_service import AsyncApplicationPackageService
+from app.services.artifact_store import ArtifactStore
+from app.services.package_queries import LATEST
 
 router = APIRouter()
 
@@ -12,9 +18,70 @@ async def get_cwl_file(
     namespace: str,
     artifactName: str,
     version: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    service = ApplicationPackageService(db)
-    filepath = service.get_cwl_file_path(namespace, artifactName, version)
-    
-    return FileResponse(filepath)
\ No newline at end of file
+    """
+    Download the CWL file of a package version, or of the latest published
+    version. Supports If-None-Match and single byte Range requests, and sends
+    the gzip or zstd variant stored at ingest when the client accepts it;
+    published versions are cacheable forever.
+    """
+    service = AsyncApplicationPackageService(db)
+    cwl_file = await service.get_cwl_file(namespace, artifactName, version)
+    if cwl_file is None:
+        raise HTTPException(status_code=404, detail="Application package version not found")
+    artifact_store = ArtifactStore()
+    # The ETag and caching come from sha256, so serve the content-addressed blob,
+    # which never changes; only rows registered without a digest use the version path
+    file_path = artifact_store.blob_path(cwl_file.sha256) if cwl_file.sha256 else cwl_file.cwl_url
+    try:
+        stat = os.stat(file_path)
+    except (FileNotFoundError, TypeError):
+        raise HTTPException(status_code=404, detail="CWL file not found")
+
+    # Variants are compressed copies of this same blob, so every representation
+    # shares its stat and digest. Ranges are only served from the uncompressed file
+    range_header = request.headers.get("range")
+    encoding = None
+    if cwl_file.sha256 and not range_header:
+        encoding = compression.negotiate(request.headers.get("accept-encoding"),
+                                         artifact_store.available_encodings(cwl_file.sha256))
+
+    etag = http_cache.file_etag(cwl_file.sha256, stat, encoding)
+    headers = {
+        "ETag": etag,
+        # latest moves to newer versions, so it is always revalidated
+        "Cache-Control": http_cache.IMMUTABLE if cwl_file.published and version != LATEST else http_cache.REVALIDATE,
+        "Accept-Ranges": "bytes",
+    }
+    if cwl_file.sha256:
+        headers["Vary"] = "Accept-Encoding"
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(cwl_file.cwl_url)[0] or "text/plain"
+    if encoding is not None:
+        # Precompressed at ingest, sent as stored
+        return FileResponse(artifact_store.variant_path(cwl_file.sha256, encoding), media_type=media_type,
+                            headers={**headers, "Content-Encoding": encoding})
+
+    if range_header and http_cache.if_range_matches(request.headers.get("if-range"), etag):
+        try:
+            byte_range = http_cache.parse_range(range_header, stat.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                http_cache.read_range(file_path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+                    "Content-Length": str(end - start + 1),
+                }
+            )
+
+    return FileResponse(file_path, media_type=media_type, headers=headers, stat_result=stat)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from fastapi.security import HTTPAuthorizationCredentials
 from app.core.security import security
@@ -6,9 +6,10 @@ from app.models.package_summary import PackageDiscoveryResponse, ApplicationPack
 from app.models.application_package import ApplicationPackageDetails, ApplicationPackageCreate
 from datetime import datetime
 from typing import Optional
-from app.services.application_package_service import ApplicationPackageService
-from app.core.database import get_db
-from sqlalchemy.orm import Session
+from app.services.async_application_package_service import AsyncApplicationPackageService
+from app.services.package_queries import encode_cursor
+from app.core.database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
@@ -16,24 +17,49 @@ router = APIRouter()
 async def discover_packages(
     namespace: Optional[str] = Query(None, description="Filter by namespace"),
     name: Optional[str] = Query(None, description="Filter by application name"),
+    q: Optional[str] = Query(None, min_length=1, description="Search names, descriptions, uploaders and docker images; results are ranked and paged by page number"),
     published: Optional[bool] = Query(True, description="Filter by publication status"),
-    page: int = Query(1, description="Page number for pagination"),
-    limit: int = Query(20, description="Number of items per page"),
+    page: int = Query(1, ge=1, description="Page number for pagination, ignored when a cursor is given"),
+    limit: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    includeVersions: bool = Query(False, description="Include the versions of each package"),
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
-    service = ApplicationPackageService(db)
+    service = AsyncApplicationPackageService(db)
+
+    if q is not None:
+        if cursor is not None or name is not None:
+            raise HTTPException(status_code=400, detail="q cannot be combined with cursor or name")
+        package_list = await service.search_packages(q, namespace, published, limit, (page - 1) * limit,
+                                                     with_versions=includeVersions)
+        total = await service.count_search(q, namespace, published)
+    else:
+        try:
+            # One extra row tells whether there is a next page
+            package_list = await service.list_packages(namespace, name, published, limit + 1, cursor, (page - 1) * limit,
+                                                       with_versions=includeVersions)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total = await service.count_packages(namespace, name, published)
+
+    next_cursor = None
+    if q is None and len(package_list) > limit:
+        package_list = package_list[:limit]
+        next_cursor = encode_cursor(package_list[-1])
 
-    # TODO: Implement actual package discovery logic and filters
-    package_list = service.list_packages(namespace, name)
     plist = []
     for package in package_list:
-        p = ApplicationPackageDetails.from_db_package(package)
+        if includeVersions:
+            p = ApplicationPackageDetails.from_db_package_with_versions(package)
+        else:
+            p = ApplicationPackageDetails.from_db_package(package)
         plist.append(p)
 
     return PackageDiscoveryResponse(
-        total=1,
+        total=total,
         page=page,
         limit=limit,
-        packages=plist
-    ) 
\ No newline at end of file
+        packages=plist,
+        nextCursor=next_cursor
+    )
\ No newline at end of file
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from app.services import validation_cache
+
+router = APIRouter()
+
+@router.get("")
+async def get_metrics():
+    """
+    Process-local cache counters for this API worker
+    """
+    return {
+        "validation_cache": validation_cache.stats()
+    }
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe in-process mapping that keeps at most maxsize entries,
+    evicting the least recently used one first.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    In-process cache whose entries expire ttl seconds after they are stored.
+    None values (lookups that found nothing) are kept for negative_ttl
+    instead. Concurrent misses for the same key are collapsed into a single
+    load, both across threads (get_or_load) and across coroutines
+    (get_or_load_async); failed loads are not cached. The load methods take
+    an optional ttl callable to pick the lifetime from the loaded value.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.clock = clock
+        self._entries = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires, value = entry
+        if expires <= self.clock():
+            self._entries.invalidate(key)
+            return _MISSING
+        return value
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        self._entries.put(key, (self.clock() + ttl, value))
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.invalidate(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    ttl: Optional[Callable[[Any], float]] = None) -> Any:
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            # Loaded by the thread we waited for
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            try:
+                value = loader()
+                self.put(key, value, ttl(value) if ttl else None)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                                ttl: Optional[Callable[[Any], float]] = None) -> Any:
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(loader())
+            self._pending[key] = future
+
+            def _loaded(done: asyncio.Future) -> None:
+                self._pending.pop(key, None)
+                if not done.cancelled() and done.exception() is None:
+                    self.put(key, done.result(), ttl(done.result()) if ttl else None)
+
+            future.add_done_callback(_loaded)
+        # A waiter being cancelled must not cancel the shared load
+        return await asyncio.shield(future)
@@ -0,0 +1,119 @@
+"""
+Content encodings for API responses.
+
+Stored CWL files are compressed once at ingest (see ArtifactStore) and the
+variant matching the client's Accept-Encoding is served as is. JSON
+responses are compressed on the way out by JSONCompressionMiddleware when
+they are large enough to be worth it.
+
+zstd is used when the optional zstandard package is installed; gzip is
+always available.
+"""
+import gzip
+from typing import Callable, Dict, Iterable, Optional
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _zstd(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# Supported encodings, most preferred first
+ENCODERS: Dict[str, Callable[[bytes, int], bytes]] = {"zstd": _zstd, "gzip": _gzip} if zstandard else {"gzip": _gzip}
+
+
+def compress(data: bytes, encoding: str, stored: bool = False) -> bytes:
+    """Compress for a response, or with the slower, denser levels used for stored variants."""
+    if encoding == "zstd":
+        level = settings.STORED_ZSTD_LEVEL if stored else settings.RESPONSE_ZSTD_LEVEL
+    else:
+        level = settings.STORED_GZIP_LEVEL if stored else settings.RESPONSE_GZIP_LEVEL
+    return ENCODERS[encoding](data, level)
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str] = None) -> Optional[str]:
+    """Preferred encoding the client accepts among available, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    candidates = [encoding for encoding in (available if available is not None else ENCODERS) if encoding in ENCODERS]
+    accepted = [encoding for encoding in candidates if weights.get(encoding, weights.get("*", 0.0)) > 0]
+    if not accepted:
+        return None
+    # Highest weight wins; ties go to the server's preference order
+    return max(accepted, key=lambda encoding: (weights.get(encoding, weights.get("*", 0.0)), -candidates.index(encoding)))
+
+
+class JSONCompressionMiddleware:
+    """
+    Compresses application/json responses of at least minimum_size bytes
+    with the best encoding the client accepts. Other responses, including
+    file downloads and event streams, pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        body = []
+
+        async def compressing_send(message):
+            nonlocal start
+            if start is None and message["type"] == "http.response.start":
+                response_headers = dict(message.get("headers", []))
+                content_type = response_headers.get(b"content-type", b"")
+                if not content_type.startswith(b"application/json") or b"content-encoding" in response_headers:
+                    start = False
+                    await send(message)
+                else:
+                    start = message
+                return
+            if start is False or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            payload = b"".join(body)
+            response_headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"content-length"]
+            if len(payload) >= self.minimum_size:
+                payload = compress(payload, encoding)
+                response_headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+            response_headers.append((b"content-length", str(len(payload)).encode()))
+            await send({**start, "headers": response_headers})
+            await send({"type": "http.response.body", "body": payload})
+
+        await self.app(scope, receive, compressing_send)
@@ -12,10 +12,74 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_URL: Optional[str] = "database_url"
+    # Async driver URL for the API routes; derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool, applied to both the sync and async engines
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
     
     # Storage Configuration
     STORAGE_PATH: str = "./storage"
+    # Content-addressed blob store; defaults to STORAGE_PATH/.blobs. Must be on
+    # the same filesystem as STORAGE_PATH for uploads to be hardlinked.
+    ARTIFACT_STORE_PATH: Optional[str] = None
+    # Uploads larger than this (bytes) are rejected while streaming
+    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+    # Largest request body of other routes, e.g. a batch of files and archives;
+    # single uploads are limited to about MAX_UPLOAD_SIZE (see app/core/request_limits.py)
+    MAX_REQUEST_SIZE: int = 100 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024
+    # Maximum number of CWL files accepted by one batch registration
+    MAX_BATCH_SIZE: int = 100
     
+    # Worker processes used to validate and parse uploads off the event loop;
+    # 0 validates in the API process threadpool instead
+    VALIDATION_POOL_SIZE: int = 2
+    # Validation results cached by content hash and validator version; 0 disables
+    VALIDATION_CACHE_MAX_ENTRIES: int = 10000
+    # How often entries over the limit are evicted, and how stale last_used_at may get before a hit updates it
+    VALIDATION_CACHE_EVICT_INTERVAL_SECONDS: float = 300.0
+    VALIDATION_CACHE_TOUCH_SECONDS: float = 3600.0
+    # Resolved CWL files of published versions kept in memory per API process; 0 disables.
+    # Unpublishing drops the copy of the process serving it; other processes keep theirs up to the TTL
+    CWL_FILE_CACHE_SIZE: int = 1024
+    CWL_FILE_CACHE_TTL_SECONDS: float = 60.0
+    # Store gzip (and zstd, when zstandard is installed) copies of each CWL at ingest
+    PRECOMPRESS_CWL: bool = True
+    STORED_GZIP_LEVEL: int = 9
+    STORED_ZSTD_LEVEL: int = 19
+    # JSON responses smaller than this are sent uncompressed
+    COMPRESSION_MIN_SIZE: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_ZSTD_LEVEL: int = 3
+
+    # Ingest job queue. When enabled, registrations are only queued in the jobs
+    # table and processed by separately scaled workers (python worker.py)
+    USE_JOB_QUEUE: bool = False
+    JOB_LEASE_SECONDS: int = 300
+    JOB_HEARTBEAT_SECONDS: int = 30
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_MAX_ATTEMPTS: int = 3
+    # Progress ticks that do not change a job's status are written at most this often
+    JOB_PROGRESS_MIN_INTERVAL_SECONDS: float = 1.0
+    # Finished jobs older than this are moved to jobs_archive by python retention.py
+    JOB_RETENTION_DAYS: int = 30
+    JOB_ARCHIVE_BATCH_SIZE: int = 1000
+    # Monthly jobs partitions created ahead of time on Postgres
+    JOB_PARTITION_MONTHS_AHEAD: int = 2
+    # Longest ?wait= accepted by GET /catalog-job/{job_id}, and the SSE keepalive interval
+    JOB_WAIT_MAX_SECONDS: float = 60.0
+    JOB_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    # Backoff between attempts to re-establish the LISTEN connection for job changes
+    JOB_EVENTS_RECONNECT_MIN_SECONDS: float = 1.0
+    JOB_EVENTS_RECONNECT_MAX_SECONDS: float = 60.0
+    # Most jobs returned by POST /catalog-job/bulk, and most ids accepted
+    JOB_BULK_MAX_JOBS: int = 500
+    # asOf is moved back by this much to cover transactions still open when it was taken
+    JOB_BULK_AS_OF_OVERLAP_SECONDS: float = 5.0
+
     # CORS Configuration
     BACKEND_CORS_ORIGINS: list[str] = ["*"]
     
@@ -30,6 +94,24 @@ class Settings(BaseSettings):
 
     # RDM
     RDM_URL: str = None
+    # Token used by queue workers, which have no user request to take one from
+    RDM_SERVICE_TOKEN: Optional[str] = None
+    # Keep-alive connection pool shared by all RDM calls of a process
+    RDM_POOL_CONNECTIONS: int = 4
+    RDM_POOL_SIZE: int = 20
+    RDM_CONNECT_TIMEOUT: float = 5.0
+    RDM_READ_TIMEOUT: float = 30.0
+    # Community ids rarely change; unknown communities are rechecked sooner
+    RDM_COMMUNITY_CACHE_SIZE: int = 256
+    RDM_COMMUNITY_TTL_SECONDS: float = 3600.0
+    RDM_COMMUNITY_NEGATIVE_TTL_SECONDS: float = 60.0
+    # Package and version lookups; published versions are immutable in RDM,
+    # packages, drafts, develop and misses are refreshed after RDM_LOOKUP_TTL_SECONDS
+    RDM_LOOKUP_CACHE_SIZE: int = 1024
+    RDM_PUBLISHED_TTL_SECONDS: float = 3600.0
+    RDM_LOOKUP_TTL_SECONDS: float = 30.0
+    # Hits per page of version searches; an exact version match is almost always on the first page
+    RDM_VERSION_PAGE_SIZE: int = 5
 
 
     class Config:
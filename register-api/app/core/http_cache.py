@@ -0,0 +1,81 @@
+"""
+Helpers for HTTP validators and byte ranges on file downloads.
+
+ETags of stored CWL files are the sha256 of their content, so they are
+strong and identical across API replicas. Files registered before the hash
+was recorded fall back to a weak ETag from the file's mtime and size.
+"""
+import os
+from typing import Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+# Published versions never change
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Drafts may be replaced, so clients revalidate with If-None-Match every time
+REVALIDATE = "no-cache"
+
+
+def file_etag(sha256: Optional[str], stat: os.stat_result, encoding: Optional[str] = None) -> str:
+    """ETag of a stored file; each content encoding is a representation with its own ETag."""
+    if sha256:
+        return f'"{sha256}-{encoding}"' if encoding else f'"{sha256}"'
+    return f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _opaque(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or _opaque(etag) in {_opaque(candidate) for candidate in candidates}
+
+
+def if_range_matches(if_range: Optional[str], etag: str) -> bool:
+    """Whether a Range request may be served; If-Range needs a strong match."""
+    if not if_range:
+        return True
+    return not etag.startswith("W/") and if_range.strip() == etag
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single bytes range. Returns None for headers
+    to ignore (other units, multiple or malformed ranges), which are served in
+    full, and raises ValueError when the range is not satisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            raise ValueError("Range not satisfiable")
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def read_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,95 @@
+"""
+Request body size limits, enforced before a route runs.
+
+Starlette spools multipart uploads to memory and disk while parsing the form,
+before the route sees the UploadFile, so checks in the route only fire after
+the whole body has been received. BodySizeLimitMiddleware rejects oversized
+bodies up front from Content-Length, and stops reading bodies sent without
+one (chunked) as soon as they go over the limit.
+"""
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.status import HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+from app.core.config import settings
+
+# Multipart boundaries and part headers around the file of a single upload
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+class RequestTooLarge(HTTPException):
+    """
+    Raised from receive() when a body goes over the limit. An HTTPException,
+    so it comes out as a 413 even when raised while FastAPI parses the form.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(HTTP_413_REQUEST_ENTITY_TOO_LARGE, _detail(limit))
+
+
+def request_size_limit(path: str) -> int:
+    """Largest body accepted for a request path."""
+    if path.rstrip("/").endswith("/ogc-application-package"):
+        return settings.MAX_UPLOAD_SIZE + UPLOAD_FORM_OVERHEAD
+    return settings.MAX_REQUEST_SIZE
+
+
+class BodySizeLimitMiddleware:
+    """Answers 413 to requests whose body is larger than request_size_limit()."""
+
+    def __init__(self, app, max_size: Optional[int] = None):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self.max_size if self.max_size is not None else request_size_limit(scope["path"])
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await _too_large(send, limit)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise RequestTooLarge(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            if started:
+                raise
+            await _too_large(send, limit)
+
+
+def _detail(limit: int) -> str:
+    return f"Request body exceeds maximum size of {limit} bytes"
+
+
+async def _too_large(send, limit: int) -> None:
+    body = json.dumps({"detail": _detail(limit)}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close")],
+    })
+    await send({"type": "http.response.body", "body": body})
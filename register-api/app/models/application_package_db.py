@@ -1,5 +1,5 @@
 from pydantic import ConfigDict
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Table, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Table, Integer, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -28,11 +28,19 @@ class ApplicationPackage(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    job_id = Column(String, ForeignKey('jobs.id'))
-    job = relationship("Job", back_populates="application_package")
+    # Not a foreign key: jobs is partitioned and its rows are eventually archived
+    job_id = Column(String)
+    job = relationship("Job", back_populates="application_package",
+                       primaryjoin="foreign(ApplicationPackage.job_id) == Job.id")
     tags = relationship("Tag", secondary=application_package_tags, back_populates="application_packages")
     versions = relationship("ApplicationPackageVersion", back_populates="application_package", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        UniqueConstraint('namespace', 'artifact_name', name='uq_application_packages_namespace_artifact_name'),
+        # Keyset order of discovery listings, see app/services/package_queries.py
+        Index('ix_application_packages_namespace_artifact_name_id', 'namespace', 'artifact_name', 'id'),
+    )
+
 class ApplicationPackageVersion(Base):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     __tablename__ = "application_package_versions"
@@ -43,6 +51,9 @@ class ApplicationPackageVersion(Base):
     cwl_version = Column(String, nullable=True)
     uploader = Column(String, nullable=True)
     cwl_url = Column(String, nullable=True)
+    docker_image = Column(String, nullable=True)
+    # Content hash of the stored CWL file, used as its ETag
+    sha256 = Column(String, nullable=True)
     published = Column(Boolean, default=False)
     published_date = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -52,6 +63,11 @@ class ApplicationPackageVersion(Base):
     application_package_id = Column(String, ForeignKey('application_packages.id'))
     application_package = relationship("ApplicationPackage", back_populates="versions")
 
+    __table_args__ = (
+        UniqueConstraint('application_package_id', 'artifact_version', name='uq_application_package_versions_package_version'),
+        Index('ix_application_package_versions_package_published', 'application_package_id', 'published'),
+    )
+
 class Tag(Base):
     __tablename__ = "tags"
 
@@ -61,4 +77,5 @@ class Tag(Base):
 
 # Update the Job model to include relationship with ApplicationPackage
 from app.models.job import Job
-Job.application_package = relationship("ApplicationPackage", back_populates="job", uselist=False) 
\ No newline at end of file
+Job.application_package = relationship("ApplicationPackage", back_populates="job", uselist=False,
+                                       primaryjoin="foreign(ApplicationPackage.job_id) == Job.id") 
\ No newline at end of file
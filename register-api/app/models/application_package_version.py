@@ -14,6 +14,7 @@ class ApplicationPackageVersion(BaseModel):
     cwl_version: Optional[str] = None
     uploader: Optional[str] = None
     cwl_url: Optional[str] = None
+    docker_image: Optional[str] = None
     id: Optional[str] = None
     published: bool
     
@@ -29,6 +30,7 @@ class ApplicationPackageVersion(BaseModel):
             cwl_version=package_version.cwl_version,
             uploader=package_version.uploader,
             cwl_url=package_version.cwl_url,
+            docker_image=package_version.docker_image,
             published=package_version.published,
         )
     
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models.job import Job, JobStatus
@@ -23,6 +23,7 @@ class CatalogJobStatus(BaseModel):
     progress: Optional[int] = None
     errorDetails: Optional[str] = None
     catalogEntryUrl: Optional[str] = None
+    batchId: Optional[str] = None
 
     @classmethod
     def from_db_job(cls, job: Job) -> 'CatalogJobStatus':
@@ -39,5 +40,58 @@ class CatalogJobStatus(BaseModel):
             createdAt=job.created_at,
             updatedAt=job.updated_at or job.created_at,
             message=job.message,
-            progress=job.progress
-        )
\ No newline at end of file
+            progress=job.progress,
+            batchId=job.batch_id
+        )
+
+class CatalogBatchResponse(BaseModel):
+    batchId: str
+    status: str
+    message: Optional[str] = None
+    jobs: List[CatalogJobResponse] = []
+
+class CatalogBatchStatus(BaseModel):
+    batchId: str
+    status: str
+    total: int
+    counts: Dict[str, int]
+    jobs: List[CatalogJobStatus] = []
+
+    @classmethod
+    def from_db_jobs(cls, batch_id: str, jobs: List[Job]) -> 'CatalogBatchStatus':
+        """
+        Aggregate the per-file jobs of a batch into a single status
+        """
+        counts = {status.value: 0 for status in JobStatus if status != JobStatus.NOT_FOUND}
+        for job in jobs:
+            counts[job.status.value] = counts.get(job.status.value, 0) + 1
+
+        done = counts[JobStatus.COMPLETED.value] + counts[JobStatus.FAILED.value]
+        if counts[JobStatus.PENDING.value] == len(jobs):
+            status = JobStatus.PENDING
+        elif done < len(jobs):
+            status = JobStatus.PROCESSING
+        elif counts[JobStatus.FAILED.value]:
+            status = JobStatus.FAILED
+        else:
+            status = JobStatus.COMPLETED
+
+        return cls(
+            batchId=batch_id,
+            status=status.value,
+            total=len(jobs),
+            counts=counts,
+            jobs=[CatalogJobStatus.from_db_job(job) for job in jobs]
+        )
+
+class CatalogJobBulkRequest(BaseModel):
+    jobIds: Optional[List[str]] = Field(None, min_length=1, description="Job ids to look up")
+    namespace: Optional[str] = Field(None, description="Look up the jobs of a namespace instead of by id")
+    createdAfter: Optional[datetime] = Field(None, description="With namespace, only jobs created at or after this time")
+    createdBefore: Optional[datetime] = Field(None, description="With namespace, only jobs created before this time")
+    changedSince: Optional[datetime] = Field(None, description="Only jobs created or updated after this time, e.g. asOf of the previous response")
+
+class CatalogJobBulkStatus(BaseModel):
+    jobs: List[CatalogJobStatus] = []
+    hasMore: bool = False
+    asOf: datetime
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Enum
+from sqlalchemy import Column, String, Integer, DateTime, Enum, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 import enum
@@ -19,10 +19,26 @@ class Job(Base):
     progress = Column(Integer, default=0)
     namespace = Column(String)
     filename = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key of the jobs table on Postgres, see app/services/job_retention.py. A partitioned
+    # table's primary key must include it, so the key is (id, created_at) as in the migration
+    created_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
     artifact_name = Column(String)
     artifact_version = Column(String)
+    sha256 = Column(String, nullable=True)
+    docker_image = Column(String, nullable=True)
+    batch_id = Column(String, nullable=True, index=True)
+
+    # Queue claim/lease bookkeeping, see app/services/job_queue.py
+    worker_id = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_jobs_status_created_at', 'status', 'created_at'),
+        Index('ix_jobs_namespace_created_at', 'namespace', 'created_at'),
+    )
 
     def __str__(self) -> str:
         """Return a string representation of the Job."""
@@ -34,4 +50,27 @@ class Job(Base):
             f"filename={self.filename}, "
             f"artifact={self.artifact_name or 'N/A'}:{self.artifact_version or 'N/A'}, "
             f"message={self.message or 'N/A'})"
-        )
\ No newline at end of file
+        )
+
+
+class JobArchive(Base):
+    """
+    Finished jobs moved out of the partitioned jobs table by the retention
+    job. Keeps only what status lookups return.
+    """
+    __tablename__ = "jobs_archive"
+
+    id = Column(String, primary_key=True)
+    status = Column(Enum(JobStatus))
+    message = Column(String)
+    progress = Column(Integer)
+    namespace = Column(String)
+    filename = Column(String)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+    artifact_name = Column(String)
+    artifact_version = Column(String)
+    sha256 = Column(String, nullable=True)
+    docker_image = Column(String, nullable=True)
+    batch_id = Column(String, nullable=True, index=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
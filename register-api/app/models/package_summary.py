@@ -19,4 +19,6 @@ class PackageDiscoveryResponse(BaseModel):
     total: int
     page: int
     limit: int
-    packages: List[ApplicationPackageDetails] 
\ No newline at end of file
+    packages: List[ApplicationPackageDetails]
+    # Pass back as ?cursor= to fetch the next page; None on the last page
+    nextCursor: Optional[str] = None 
\ No newline at end of file
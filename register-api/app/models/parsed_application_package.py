@@ -0,0 +1,22 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Optional
+
+
+class ParsedApplicationPackage(BaseModel):
+    """
+    An uploaded CWL file loaded once per registration.
+
+    Holds the loaded CWL objects alongside the raw document metadata so that
+    validation, quick parsing and background processing share a single
+    schema-salad load.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    file_path: str
+    workflow: Optional[Any] = None
+    tool: Optional[Any] = None
+    metadata: Optional[Any] = None
+    app_package: Optional[Any] = None
+    artifact_name: Optional[str] = None
+    artifact_version: Optional[str] = None
+    docker_image: Optional[str] = None
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Boolean, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ValidationResult(Base):
+    __tablename__ = "validation_results"
+
+    sha256 = Column(String, primary_key=True)
+    validator_version = Column(String, primary_key=True)
+    valid = Column(Boolean, nullable=False)
+    issues = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -2,21 +2,33 @@ from typing import Optional, Tuple
 import os
 import uuid
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, selectinload
 from fastapi.logger import logger
 
+from app.models.application_package import ApplicationPackageDetails
 from app.models.application_package_db import ApplicationPackage, ApplicationPackageVersion
-from app.models.job import JobStatus
+from app.models.application_package_version import ApplicationPackageVersion as ApplicationPackageVersionDetails
+from app.models.job import Job, JobStatus
+from app.services import job_events, package_queries
 from app.services.base_application_package_service import BaseApplicationPackageService
 
+# Dialects whose insert() supports ON CONFLICT ... RETURNING
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 
 class ApplicationPackageService(BaseApplicationPackageService):
     def __init__(self, db: Session):
         super().__init__(db)
     
     def get_cwl_file_path(self, namespace, artifactName, version):
-        package = self.get_package(namespace, artifactName)
-        return package.cwl_url
+        """Stored CWL file of a package version, or None if there is no such version; version may be latest."""
+        row = self.db.execute(package_queries.cwl_file_statement(namespace, artifactName, version)).first()
+        return row.cwl_url if row else None
 
     def get_or_create_package(
         self, 
@@ -62,7 +74,7 @@ class ApplicationPackageService(BaseApplicationPackageService):
                 published=False,
                 cwl_version: str = None,
                 uploader: str = None,
-
+                sha256: str = None,
             ) -> Tuple[ApplicationPackageVersion, bool]:
         """Get existing package or create a new one."""
         app_package_version = self.get_application_package_version(application_package, artifact_version)
@@ -77,9 +89,11 @@ class ApplicationPackageService(BaseApplicationPackageService):
                 return app_package_version, False
             app_package_version.cwl_id = cwl_id
             app_package_version.cwl_url = cwl_url
+            app_package_version.docker_image = docker_image
             app_package_version.published = published
             app_package_version.cwl_version = cwl_version
             app_package_version.uploader = uploader
+            app_package_version.sha256 = sha256
             self.db.commit()
             return app_package_version, True
         else:
@@ -88,9 +102,11 @@ class ApplicationPackageService(BaseApplicationPackageService):
                 artifact_version=artifact_version,
                 cwl_id=cwl_id,
                 cwl_url=cwl_url,
+                docker_image=docker_image,
                 published=published,
                 cwl_version=cwl_version,
                 uploader=uploader,
+                sha256=sha256,
                 application_package_id=application_package.id
             )
         self.db.add(app_package_version)
@@ -98,6 +114,89 @@ class ApplicationPackageService(BaseApplicationPackageService):
         return app_package_version, True
 
 
+    def register_package_version(self, namespace: str, artifact_name: str, artifact_version: str, job_id: str,
+                                 cwl_url: str, docker_image: str, sha256: str = None) -> bool:
+        """
+        Upsert the package and version and complete the job in one transaction.
+
+        Uses INSERT ... ON CONFLICT ... RETURNING on the (namespace,
+        artifact_name) and (application_package_id, artifact_version) unique
+        constraints, so concurrent registrations of the same package cannot
+        create duplicates. A published version is left untouched and the job
+        fails instead.
+        """
+        insert = UPSERT_DIALECTS.get(self.db.get_bind().dialect.name)
+        if insert is None:
+            return super().register_package_version(namespace, artifact_name, artifact_version, job_id, cwl_url, docker_image, sha256)
+
+        try:
+            statement = insert(ApplicationPackage).values(
+                id=str(uuid.uuid4()),
+                namespace=namespace,
+                artifact_name=artifact_name,
+                job_id=job_id
+            )
+            package_id = self.db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[ApplicationPackage.namespace, ApplicationPackage.artifact_name],
+                    set_={"job_id": statement.excluded.job_id, "updated_at": func.now()}
+                ).returning(ApplicationPackage.id)
+            ).scalar_one()
+
+            statement = insert(ApplicationPackageVersion).values(
+                id=str(uuid.uuid4()),
+                application_package_id=package_id,
+                artifact_version=artifact_version,
+                cwl_id=artifact_name,
+                cwl_url=cwl_url,
+                docker_image=docker_image,
+                published=False,
+                cwl_version=None,
+                uploader=None,
+                sha256=sha256
+            )
+            version_id = self.db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[ApplicationPackageVersion.application_package_id, ApplicationPackageVersion.artifact_version],
+                    set_={
+                        "cwl_id": statement.excluded.cwl_id,
+                        "cwl_url": statement.excluded.cwl_url,
+                        "docker_image": statement.excluded.docker_image,
+                        "published": statement.excluded.published,
+                        "cwl_version": statement.excluded.cwl_version,
+                        "uploader": statement.excluded.uploader,
+                        "sha256": statement.excluded.sha256,
+                        "updated_at": func.now(),
+                    },
+                    where=ApplicationPackageVersion.published.isnot(True)
+                ).returning(ApplicationPackageVersion.id)
+            ).scalar()
+
+            if version_id is None:
+                self.db.rollback()
+                self.update_job_status(
+                    job_id,
+                    JobStatus.FAILED,
+                    f"A Published Application package version with this namespace, name, and version already exists. {namespace}/{artifact_name}/{artifact_version}",
+                    100
+                )
+                return False
+
+            self.db.execute(
+                update(Job).where(Job.id == job_id).values(
+                    status=JobStatus.COMPLETED,
+                    message="Application package processed successfully",
+                    progress=100
+                )
+            )
+            self.db.commit()
+            job_events.publish(job_id)
+            self._job_writers.pop(job_id, None)
+            return True
+        except Exception:
+            self.db.rollback()
+            raise
+
     def _handle_version_exists(self, job_id: str, package: ApplicationPackage, artifact_version: str) -> None:
         """Handle case where package version already exists."""
         self.update_job_status(
@@ -107,17 +206,62 @@ class ApplicationPackageService(BaseApplicationPackageService):
             100
         )
 
-    def get_package(self, namespace: str, artifact_name: str) -> Optional[ApplicationPackage]:
+    def get_package(self, namespace: str, artifact_name: str, with_versions: bool = False) -> Optional[ApplicationPackage]:
         """List application package by namespace, name and version."""
-        return self.db.query(ApplicationPackage).filter(
+        query = self.db.query(ApplicationPackage).filter(
             ApplicationPackage.namespace == namespace,
             ApplicationPackage.artifact_name == artifact_name
+        )
+        if with_versions:
+            query = query.options(selectinload(ApplicationPackage.versions))
+        return query.first()
+
+    def get_package_details(self, namespace: str, artifact_name: str,
+                            version: Optional[str] = None) -> Optional[ApplicationPackageDetails]:
+        """
+        Package details with all of its versions, or with only the given
+        version. Loads in two queries, or one when a version is given.
+        """
+        if version is None:
+            package = self.get_package(namespace, artifact_name, with_versions=True)
+            return ApplicationPackageDetails.from_db_package_with_versions(package) if package else None
+
+        row = self.db.query(ApplicationPackage, ApplicationPackageVersion).join(
+            ApplicationPackageVersion, ApplicationPackageVersion.application_package_id == ApplicationPackage.id
+        ).filter(
+            ApplicationPackage.namespace == namespace,
+            ApplicationPackage.artifact_name == artifact_name,
+            ApplicationPackageVersion.artifact_version == version
         ).first()
+        if row is None:
+            return None
+        package, package_version = row
+        details = ApplicationPackageDetails.from_db_package(package)
+        details.versions = [ApplicationPackageVersionDetails.from_db_package_version(package_version)]
+        return details
+
+    def list_packages(self, namespace: Optional[str], artifact_name: Optional[str], published: Optional[bool] = None,
+                      limit: Optional[int] = None, cursor: Optional[str] = None, offset: int = 0,
+                      with_versions: bool = False) -> list[ApplicationPackage]:
+        """List application packages matching the filters, in keyset order."""
+        statement = package_queries.list_packages_statement(
+            namespace, artifact_name, published, limit, cursor, offset, with_versions
+        )
+        return list(self.db.scalars(statement).all())
+
+    def count_packages(self, namespace: Optional[str], artifact_name: Optional[str], published: Optional[bool] = None) -> int:
+        return self.db.scalar(package_queries.count_packages_statement(namespace, artifact_name, published))
+
+    def search_packages(self, q: str, namespace: Optional[str] = None, published: Optional[bool] = None,
+                        limit: Optional[int] = None, offset: int = 0, with_versions: bool = False) -> list[ApplicationPackage]:
+        """Packages matching q by name, description, uploader or docker image, most relevant first."""
+        statement = package_queries.search_packages_statement(
+            q, self.db.get_bind().dialect.name, namespace, published, limit, offset, with_versions
+        )
+        return list(self.db.scalars(statement).all())
 
-    def list_packages(self, namespace: str, artifact_name: str) -> Optional[list[ApplicationPackage]]:       
-        """Get application package by namespace, name and version."""
-        # TODO add filtering
-        return self.db.query(ApplicationPackage).all()
+    def count_search(self, q: str, namespace: Optional[str] = None, published: Optional[bool] = None) -> int:
+        return self.db.scalar(package_queries.count_search_statement(q, self.db.get_bind().dialect.name, namespace, published))
 
 
     #TODO - needs to update the _version_, not the _package_
@@ -131,6 +275,8 @@ class ApplicationPackageService(BaseApplicationPackageService):
         artifact_version.published = published
         artifact_version.published_date = datetime.now() if published else None
         self.db.commit()
+        package = artifact_version.application_package
+        package_queries.cwl_file_cache.invalidate((package.namespace, package.artifact_name, artifact_version.artifact_version))
         return artifact_version 
     
 
@@ -0,0 +1,129 @@
+import errno
+import hashlib
+import os
+import shutil
+import uuid
+from typing import List, Optional
+
+from fastapi.logger import logger
+
+from app.core import compression
+from app.core.config import settings
+
+
+class ArtifactStore:
+    """Content-addressed blob store for uploaded CWL files.
+
+    Blobs live under ``root/ab/cd/<sha256>`` and are never modified once
+    committed. Job and version paths under STORAGE_PATH are hardlinks to the
+    blob, so storing the same bytes twice costs no extra space and no copy.
+    Compressed variants of a blob sit next to it (``<sha256>.gz``, ``.zst``)
+    so downloads can be served without compressing on the fly.
+    """
+
+    VARIANT_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.ARTIFACT_STORE_PATH or os.path.join(settings.STORAGE_PATH, ".blobs")
+
+    def blob_path(self, digest: str) -> str:
+        """Return the sharded path for a sha256 hex digest."""
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.blob_path(digest))
+
+    def staging_path(self) -> str:
+        """Return a fresh path on the store's filesystem to write an upload to."""
+        staging_dir = os.path.join(self.root, "tmp")
+        os.makedirs(staging_dir, exist_ok=True)
+        return os.path.join(staging_dir, f"{uuid.uuid4()}.part")
+
+    def commit(self, staging_path: str, digest: str) -> str:
+        """Atomically move a fully written staging file into the store.
+
+        If a blob with the same digest already exists the staging file is
+        discarded.
+        """
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            os.remove(staging_path)
+            return blob
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.chmod(staging_path, 0o444)
+        os.replace(staging_path, blob)
+        return blob
+
+    def ingest(self, file_path: str) -> str:
+        """Add an existing file to the store and return its digest.
+
+        The file is hardlinked into the store rather than copied, and is
+        replaced by a link to the blob when identical content is already stored.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            self.link(digest, file_path)
+            return digest
+
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(file_path, blob)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            staging = self.staging_path()
+            shutil.copyfile(file_path, staging)
+            self.commit(staging, digest)
+        return digest
+
+    def link(self, digest: str, dest_path: str) -> str:
+        """Make dest_path reference the blob for digest.
+
+        Hardlinks are used where possible, falling back to a symlink when the
+        destination is on another filesystem. Existing links to the same blob
+        are left untouched.
+        """
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            raise FileNotFoundError(f"No artifact stored for digest {digest}")
+        if os.path.exists(dest_path) and os.path.samefile(blob, dest_path):
+            return dest_path
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        tmp_path = f"{dest_path}.{uuid.uuid4()}.tmp"
+        try:
+            os.link(blob, tmp_path)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            logger.warning(f"Unable to hardlink {blob}, falling back to a symlink: {e}")
+            os.symlink(os.path.abspath(blob), tmp_path)
+        os.replace(tmp_path, dest_path)
+        return dest_path
+
+    def variant_path(self, digest: str, encoding: str) -> str:
+        return self.blob_path(digest) + self.VARIANT_SUFFIXES[encoding]
+
+    def available_encodings(self, digest: str) -> List[str]:
+        """Encodings with a stored variant of the blob, in order of preference."""
+        return [encoding for encoding in compression.ENCODERS if os.path.exists(self.variant_path(digest, encoding))]
+
+    def write_variants(self, digest: str) -> None:
+        """Store a compressed copy of the blob for each supported encoding not stored yet."""
+        missing = [encoding for encoding in compression.ENCODERS if not os.path.exists(self.variant_path(digest, encoding))]
+        if not missing:
+            return
+        with open(self.blob_path(digest), "rb") as f:
+            data = f.read()
+        for encoding in missing:
+            staging = self.staging_path()
+            with open(staging, "wb") as f:
+                f.write(compression.compress(data, encoding, stored=True))
+            os.chmod(staging, 0o444)
+            os.replace(staging, self.variant_path(digest, encoding))
@@ -0,0 +1,145 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import DateTime, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.application_package_db import ApplicationPackage, ApplicationPackageVersion
+from app.models.job import Job, JobArchive
+from app.services import package_queries
+from app.services.package_queries import CwlFile
+
+
+class AsyncApplicationPackageService:
+    """
+    Read-only queries of the database catalog for the API routes, on an
+    AsyncSession so they do not block the event loop. Writes and ingest stay on
+    the sync ApplicationPackageService.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_package(self, namespace: str, artifact_name: str) -> Optional[ApplicationPackage]:
+        """Get application package by namespace and name."""
+        result = await self.db.execute(
+            select(ApplicationPackage).where(
+                ApplicationPackage.namespace == namespace,
+                ApplicationPackage.artifact_name == artifact_name
+            ).limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_application_package_version(self, application_package: ApplicationPackage,
+                                              artifact_version: str) -> Optional[ApplicationPackageVersion]:
+        result = await self.db.execute(
+            select(ApplicationPackageVersion).where(
+                ApplicationPackageVersion.application_package_id == application_package.id,
+                ApplicationPackageVersion.artifact_version == artifact_version
+            ).limit(1)
+        )
+        return result.scalars().first()
+
+    async def list_packages(self, namespace: Optional[str], artifact_name: Optional[str], published: Optional[bool] = None,
+                            limit: Optional[int] = None, cursor: Optional[str] = None, offset: int = 0,
+                            with_versions: bool = False) -> List[ApplicationPackage]:
+        """List application packages matching the filters, in keyset order."""
+        statement = package_queries.list_packages_statement(
+            namespace, artifact_name, published, limit, cursor, offset, with_versions
+        )
+        result = await self.db.execute(statement)
+        return list(result.scalars().all())
+
+    async def count_packages(self, namespace: Optional[str], artifact_name: Optional[str], published: Optional[bool] = None) -> int:
+        return await self.db.scalar(package_queries.count_packages_statement(namespace, artifact_name, published))
+
+    async def search_packages(self, q: str, namespace: Optional[str] = None, published: Optional[bool] = None,
+                              limit: Optional[int] = None, offset: int = 0, with_versions: bool = False) -> List[ApplicationPackage]:
+        """Packages matching q by name, description, uploader or docker image, most relevant first."""
+        statement = package_queries.search_packages_statement(
+            q, self.db.get_bind().dialect.name, namespace, published, limit, offset, with_versions
+        )
+        result = await self.db.execute(statement)
+        return list(result.scalars().all())
+
+    async def count_search(self, q: str, namespace: Optional[str] = None, published: Optional[bool] = None) -> int:
+        return await self.db.scalar(package_queries.count_search_statement(q, self.db.get_bind().dialect.name, namespace, published))
+
+    async def get_cwl_file_path(self, namespace: str, artifact_name: str, version: str) -> Optional[str]:
+        """Stored CWL file of a package version, or None if there is no such version."""
+        cwl_file = await self.get_cwl_file(namespace, artifact_name, version)
+        return cwl_file.cwl_url if cwl_file else None
+
+    async def get_cwl_file(self, namespace: str, artifact_name: str, version: str) -> Optional[CwlFile]:
+        """Stored CWL file of a package version, or None if there is no such version; version may be latest."""
+        cwl_file = package_queries.cwl_file_cache.get((namespace, artifact_name, version))
+        if cwl_file is not None:
+            return cwl_file
+        result = await self.db.execute(package_queries.cwl_file_statement(namespace, artifact_name, version))
+        row = result.first()
+        cwl_file = CwlFile(*row) if row else None
+        package_queries.cache_cwl_file(namespace, artifact_name, version, cwl_file)
+        return cwl_file
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        # Job ids carry no creation time to bound created_at with, so on Postgres this
+        # probes ix_jobs_id in every monthly partition; retention keeps those few
+        result = await self.db.execute(select(Job).where(Job.id == job_id))
+        # Jobs moved out by the retention task are still reported from the archive
+        return result.scalar_one_or_none() or await self.db.get(JobArchive, job_id)
+
+    async def get_batch_jobs(self, batch_id: str) -> List[Job]:
+        jobs = []
+        for model in (Job, JobArchive):
+            result = await self.db.execute(select(model).where(model.batch_id == batch_id))
+            jobs.extend(result.scalars().all())
+        return sorted(jobs, key=lambda job: (job.created_at, job.id))
+
+    async def database_now(self) -> datetime:
+        """Current time by the database clock, the one that stamps updated_at."""
+        # now() is the start of the current transaction on PostgreSQL
+        if self.db.get_bind().dialect.name == "postgresql":
+            now = func.clock_timestamp(type_=DateTime(timezone=True))
+        else:
+            now = func.now(type_=DateTime(timezone=True))
+        value = await self.db.scalar(select(now))
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+    async def get_jobs(self, job_ids: Optional[List[str]] = None, namespace: Optional[str] = None,
+                       created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                       changed_since: Optional[datetime] = None, limit: Optional[int] = None) -> List[Job]:
+        """
+        Jobs by id, or of a namespace within a created_at window, in one query
+        on the jobs primary key or the (namespace, created_at) index. Ids not
+        found among the live jobs are looked up in the archive.
+        """
+        live = await self.db.execute(
+            self._jobs_statement(Job, job_ids, namespace, created_after, created_before, changed_since, limit)
+        )
+        jobs = list(live.scalars().all())
+        if job_ids is not None:
+            missing = set(job_ids) - {job.id for job in jobs}
+            if missing:
+                archived = await self.db.execute(
+                    self._jobs_statement(JobArchive, list(missing), None, None, None, changed_since, None)
+                )
+                jobs = sorted(jobs + list(archived.scalars().all()), key=lambda job: (job.created_at, job.id))
+        return jobs
+
+    @staticmethod
+    def _jobs_statement(model, job_ids, namespace, created_after, created_before, changed_since, limit):
+        statement = select(model)
+        if job_ids is not None:
+            statement = statement.where(model.id.in_(job_ids))
+        if namespace is not None:
+            statement = statement.where(model.namespace == namespace)
+        if created_after is not None:
+            statement = statement.where(model.created_at >= created_after)
+        if created_before is not None:
+            statement = statement.where(model.created_at < created_before)
+        if changed_since is not None:
+            statement = statement.where(func.coalesce(model.updated_at, model.created_at) > changed_since)
+        statement = statement.order_by(model.created_at, model.id)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
@@ -1,29 +1,78 @@
-from typing import Optional, Tuple
+from typing import BinaryIO, Optional, Tuple
 import os
 import uuid
+import hashlib
+import tarfile
+import zipfile
 from datetime import datetime
 import cwl_utils
 import cwl_utils.parser
+from sqlalchemy import DateTime, func, select
 from sqlalchemy.orm import Session
+from fastapi import UploadFile
 from fastapi.logger import logger
+from starlette.concurrency import run_in_threadpool
 from types import SimpleNamespace
 
 from app.models.job import Job, JobStatus
+from app.models.parsed_application_package import ParsedApplicationPackage
 from app.core.config import settings
+from app.services.artifact_store import ArtifactStore
+from app.services.cwl_sniffer import sniff_cwl
+from app.services.job_progress import JobProgressWriter
 from ap_validator.app_package import AppPackage
 import schema_salad
-import shutil
 import yaml
 
 
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds settings.MAX_UPLOAD_SIZE."""
+
+
+class _StagedUpload:
+    """An upload being written to the artifact store's staging area."""
+
+    def __init__(self, artifact_store: ArtifactStore):
+        self.artifact_store = artifact_store
+        self.path = artifact_store.staging_path()
+        self.buffer = open(self.path, "wb")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > settings.MAX_UPLOAD_SIZE:
+            raise UploadTooLargeError(f"Upload exceeds maximum size of {settings.MAX_UPLOAD_SIZE} bytes")
+        self.digest.update(chunk)
+        self.buffer.write(chunk)
+
+    def commit(self) -> str:
+        """Move the completed upload into the store and return its sha256."""
+        self.buffer.close()
+        sha256 = self.digest.hexdigest()
+        self.artifact_store.commit(self.path, sha256)
+        return sha256
+
+    def discard(self) -> None:
+        self.buffer.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class BaseApplicationPackageService:
     def __init__(self, db: Session):
         self.db = db
+        self.artifact_store = ArtifactStore()
+        self._job_writers: dict[str, JobProgressWriter] = {}
 
-    def validate_package(self, file_path: str) -> bool:
-        """Validate the application package using the validator."""
+    def validate_package(self, file_path: str, parsed: ParsedApplicationPackage = None) -> bool:
+        """Validate the application package using the validator.
+
+        When a parsed package is given its already loaded AppPackage is reused
+        instead of loading the file again.
+        """
         try:
-            ap = AppPackage.from_url(file_path)
+            ap = parsed.app_package if parsed is not None else AppPackage.from_url(file_path)
             result = ap.check_all(include=["error", "hint"])
             return result['valid'], result.get('issues', [])
         except schema_salad.exceptions.ValidationException as e:
@@ -39,10 +88,101 @@ class BaseApplicationPackageService:
             buffer.write(file_content)
         return file_path
 
-    def quick_parse(self, namespace: str, jobId: str, filename: str) -> Tuple[str, str]:
-        """Quick parse the uploaded file."""
+    async def save_uploaded_stream(self, namespace: str, jobId: str, upload: UploadFile, filename: str) -> Tuple[str, str, int]:
+        """Stream the uploaded file into the artifact store in chunks.
+
+        Returns the job staging path, the sha256 hex digest and the size in
+        bytes. The staging path is a link to the content-addressed blob, so
+        identical uploads share a single copy on disk.
+        """
+        if upload.size is not None and upload.size > settings.MAX_UPLOAD_SIZE:
+            raise UploadTooLargeError(f"Upload exceeds maximum size of {settings.MAX_UPLOAD_SIZE} bytes")
+
+        staged = _StagedUpload(self.artifact_store)
+        try:
+            while chunk := await upload.read(settings.UPLOAD_CHUNK_SIZE):
+                staged.write(chunk)
+            sha256 = staged.commit()
+        except BaseException:
+            staged.discard()
+            raise
+        return self._link_job_file(namespace, jobId, filename, sha256), sha256, staged.size
+
+    def save_uploaded_fileobj(self, namespace: str, jobId: str, fileobj: BinaryIO, filename: str) -> Tuple[str, str, int]:
+        """Blocking counterpart of save_uploaded_stream for file objects such as archive members."""
+        staged = _StagedUpload(self.artifact_store)
+        try:
+            while chunk := fileobj.read(settings.UPLOAD_CHUNK_SIZE):
+                staged.write(chunk)
+            sha256 = staged.commit()
+        except BaseException:
+            staged.discard()
+            raise
+        return self._link_job_file(namespace, jobId, filename, sha256), sha256, staged.size
+
+    def _link_job_file(self, namespace: str, jobId: str, filename: str, sha256: str) -> str:
         file_path = os.path.join(settings.STORAGE_PATH, namespace, jobId, filename)
-        cwl_workflow, cwl_tool, cwl_metadata = self.parse_cwl_file(file_path)
+        self.artifact_store.link(sha256, file_path)
+        return file_path
+
+    def save_uploaded_archive(self, namespace: str, upload: UploadFile) -> list[Tuple[str, str, str, str]]:
+        """Store each CWL member of an uploaded .zip or .tar(.gz) archive.
+
+        Returns (jobId, filename, file_path, sha256) for every member, each
+        under its own new job id. Members are size checked individually.
+        """
+        stored = []
+        fileobj = upload.file
+        fileobj.seek(0)
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            with zipfile.ZipFile(fileobj) as archive:
+                members = [m for m in archive.infolist() if not m.is_dir() and m.filename.endswith(".cwl")]
+                self._check_batch_size(len(members))
+                for member in members:
+                    if member.file_size > settings.MAX_UPLOAD_SIZE:
+                        raise UploadTooLargeError(f"{member.filename} exceeds maximum size of {settings.MAX_UPLOAD_SIZE} bytes")
+                    with archive.open(member) as member_file:
+                        stored.append(self._save_archive_member(namespace, member.filename, member_file))
+        else:
+            fileobj.seek(0)
+            try:
+                archive = tarfile.open(fileobj=fileobj, mode="r:*")
+            except tarfile.TarError:
+                raise ValueError(f"{upload.filename} is not a CWL file or a zip/tar archive")
+            with archive:
+                members = [m for m in archive.getmembers() if m.isfile() and m.name.endswith(".cwl")]
+                self._check_batch_size(len(members))
+                for member in members:
+                    if member.size > settings.MAX_UPLOAD_SIZE:
+                        raise UploadTooLargeError(f"{member.name} exceeds maximum size of {settings.MAX_UPLOAD_SIZE} bytes")
+                    stored.append(self._save_archive_member(namespace, member.name, archive.extractfile(member)))
+        return stored
+
+    def _save_archive_member(self, namespace: str, member_name: str, member_file: BinaryIO) -> Tuple[str, str, str, str]:
+        jobId = str(uuid.uuid4())
+        filename = os.path.basename(member_name)
+        file_path, sha256, _ = self.save_uploaded_fileobj(namespace, jobId, member_file, filename)
+        return jobId, filename, file_path, sha256
+
+    def _check_batch_size(self, count: int) -> None:
+        if count > settings.MAX_BATCH_SIZE:
+            raise ValueError(f"Batch contains {count} CWL files, the maximum is {settings.MAX_BATCH_SIZE}")
+
+    def quick_parse(self, namespace: str, jobId: str, filename: str, parsed: ParsedApplicationPackage = None) -> Tuple[str, str]:
+        """Quick parse the uploaded file.
+
+        Without a parsed package the name and version are sniffed from the YAML
+        event stream rather than loading the CWL. When a parsed package is
+        given, the extracted name, version and docker image are recorded on it
+        for the background processing stage.
+        """
+        if parsed is None:
+            file_path = os.path.join(settings.STORAGE_PATH, namespace, jobId, filename)
+            sniffed = sniff_cwl(file_path)
+            return sniffed.artifact_name, sniffed.artifact_version
+
+        cwl_workflow, cwl_tool, cwl_metadata = parsed.workflow, parsed.tool, parsed.metadata
 
         # the versions we're expecting contain a #workflow and #CommandLinetool in the uploaded CWL.
         if not cwl_workflow or not cwl_tool:
@@ -52,41 +192,82 @@ class BaseApplicationPackageService:
         artifact_name = self._extract_artifact_name(cwl_workflow)
         artifact_version = self._extract_artifact_version(cwl_metadata)
 
+        parsed.artifact_name = artifact_name
+        parsed.artifact_version = artifact_version
+        parsed.docker_image = self.extract_docker_image(cwl_tool)
+
         return artifact_name, artifact_version
 
-    def create_job(self, jobId: str, namespace: str, filename: str, artifact_name: str = None, artifact_version: str = None) -> Job:
+    def create_job(self, jobId: str, namespace: str, filename: str, artifact_name: str = None, artifact_version: str = None,
+                   sha256: str = None, docker_image: str = None) -> Job:
         """Create a new job record."""
-        job = Job(
+        job = self._new_job(jobId, namespace, filename, artifact_name, artifact_version, sha256, docker_image,
+                            created_at=self._database_now())
+        self.db.add(job)
+        self.db.commit()
+        return job
+
+    def create_jobs(self, job_specs: list[dict]) -> list[Job]:
+        """Create several job records, given as create_job keyword arguments, in a single transaction."""
+        created_at = self._database_now()
+        jobs = [self._new_job(**spec, created_at=created_at) for spec in job_specs]
+        self.db.add_all(jobs)
+        self.db.commit()
+        return jobs
+
+    def _new_job(self, jobId: str, namespace: str, filename: str, artifact_name: str = None, artifact_version: str = None,
+                 sha256: str = None, docker_image: str = None, batch_id: str = None,
+                 created_at: Optional[datetime] = None) -> Job:
+        return Job(
             id=jobId,
+            created_at=created_at,
             status=JobStatus.PENDING,
             message="Job queued for processing",
             progress=0,
             namespace=namespace,
             filename=filename,
             artifact_name=artifact_name,
-            artifact_version=artifact_version
+            artifact_version=artifact_version,
+            sha256=sha256,
+            docker_image=docker_image,
+            batch_id=batch_id
         )
-        self.db.add(job)
-        self.db.commit()
-        return job
+
+    def _database_now(self) -> datetime:
+        # created_at is part of the job's primary key, so it is set before the insert rather
+        # than left to the server default, still by the database clock like updated_at
+        return self.db.scalar(select(func.now(type_=DateTime(timezone=True))))
+
+    def job_progress(self, job_id: str) -> JobProgressWriter:
+        """Progress writer for a job, kept for the job's lifetime in this service."""
+        writer = self._job_writers.get(job_id)
+        if writer is None:
+            writer = self._job_writers[job_id] = JobProgressWriter(self.db, job_id)
+        return writer
 
     def update_job_status(self, job_id: str, status: JobStatus, message: str, progress: int = 0) -> None:
         """Update job status and progress."""
-        job = self.db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            job.status = status
-            job.message = message
-            job.progress = progress
-            self.db.commit()
+        writer = self.job_progress(job_id)
+        writer.update(status, message, progress)
+        if writer.finished:
+            del self._job_writers[job_id]
 
-    def parse_cwl_file(self, file_path: str) -> Tuple[object, object, object]:
-        """Parse CWL file and extract workflow and tool information."""
-        cwl = cwl_utils.parser.load_document_by_uri(file_path, load_all=True)
+    def load_package(self, file_path: str) -> ParsedApplicationPackage:
+        """Load a CWL file once for validation and processing.
+
+        The YAML is read a single time and handed to the validator's AppPackage,
+        whose loaded CWL objects are reused for the workflow and tool.
+        """
+        # Only works on yaml?
+        with open(file_path, 'r') as file:
+            data = yaml.safe_load(file)
+        extra_meta = self.dict_to_namespace(data)
+
+        ap = AppPackage(cwl=data)
         cwl_workflow = None
         cwl_tool = None
-        extra_meta = None
-        
-        for x in cwl:
+
+        for x in ap.cwl_obj:
             logger.debug(x)
             if "Workflow" in str(type(x)):
                 logger.info(f"Found workflow: {x.id}")
@@ -95,11 +276,18 @@ class BaseApplicationPackageService:
                 logger.info(f"Found tool: {x.id}")
                 cwl_tool = x
 
-        # Only works on yaml?
-        with open(file_path, 'r') as file:
-            data = yaml.safe_load(file)
-        extra_meta = self.dict_to_namespace(data)
-        return cwl_workflow, cwl_tool, extra_meta
+        return ParsedApplicationPackage(
+            file_path=file_path,
+            workflow=cwl_workflow,
+            tool=cwl_tool,
+            metadata=extra_meta,
+            app_package=ap
+        )
+
+    def parse_cwl_file(self, file_path: str) -> Tuple[object, object, object]:
+        """Parse CWL file and extract workflow and tool information."""
+        parsed = self.load_package(file_path)
+        return parsed.workflow, parsed.tool, parsed.metadata
 
     def dict_to_namespace(self, data):
         if isinstance(data, dict):
@@ -111,7 +299,8 @@ class BaseApplicationPackageService:
 
     def extract_docker_image(self, cwl_tool: object) -> Optional[str]:
         """Extract docker image from CWL tool requirements."""
-        reqs: list[any] = cwl_tool.requirements
+        # requirements is None when the tool has none, e.g. only hints
+        reqs: list[any] = cwl_tool.requirements or []
         for req in reqs:
             if "DockerRequirement" in str(type(req)):
                 return req.dockerPull
@@ -126,7 +315,11 @@ class BaseApplicationPackageService:
 
     def _extract_artifact_version(self, cwl_meta: object) -> str:
         """Extract artifact version from CWL workflow."""
-        return cwl_meta.__getattribute__('s:softwareVersion')
+        # YAML may resolve the version to a number or date; it is stored as text
+        version = cwl_meta.__getattribute__('s:softwareVersion')
+        if version is None:
+            raise ValueError("Missing s:softwareVersion")
+        return str(version)
 
     def _handle_successful_processing(self, job_id: str) -> None:
         """Handle successful package processing."""
@@ -147,58 +340,98 @@ class BaseApplicationPackageService:
             f"Error processing application package: {str(error)}"
         )
 
-    def process_application_package(self, namespace: str, filename: str, job_id: str) -> None:
-        """Process the uploaded application package."""
+    def process_application_package(self, namespace: str, filename: str, job_id: str, sha256: str = None,
+                                    parsed: ParsedApplicationPackage = None) -> None:
+        """Process the uploaded application package.
+
+        A package already parsed during the request is reused as is; the stored
+        file is only parsed here when no parsed package is handed over.
+        """
         try:
             self.update_job_status(job_id, JobStatus.PROCESSING, "Processing application package")
             
-            # Parse CWL file and extract information
             file_path = os.path.join(settings.STORAGE_PATH, namespace, job_id, filename)
-            cwl_workflow, cwl_tool, extra_metadata = self.parse_cwl_file(file_path)
-            
-            # the versions we're expecting contain a #workflow and #CommandLinetool in the uploaded CWL.
-            if not cwl_workflow or not cwl_tool:
-                raise ValueError("Invalid CWL file: missing workflow or tool definition")
-            
-            # Extract package information
-            artifact_name = self._extract_artifact_name(cwl_workflow)
-            docker_image = self.extract_docker_image(cwl_tool)
-            artifact_version = self._extract_artifact_version(extra_metadata)
+            if parsed is not None and parsed.artifact_name is not None:
+                # Already extracted by quick_parse during the request
+                artifact_name = parsed.artifact_name
+                docker_image = parsed.docker_image
+                artifact_version = parsed.artifact_version
+            else:
+                # Parse CWL file and extract information
+                if parsed is None:
+                    cwl_workflow, cwl_tool, extra_metadata = self.parse_cwl_file(file_path)
+                else:
+                    cwl_workflow, cwl_tool, extra_metadata = parsed.workflow, parsed.tool, parsed.metadata
+
+                # the versions we're expecting contain a #workflow and #CommandLinetool in the uploaded CWL.
+                if not cwl_workflow or not cwl_tool:
+                    raise ValueError("Invalid CWL file: missing workflow or tool definition")
+
+                # Extract package information
+                artifact_name = self._extract_artifact_name(cwl_workflow)
+                docker_image = self.extract_docker_image(cwl_tool)
+                artifact_version = self._extract_artifact_version(extra_metadata)
             logger.debug("processing {}:{}".format(artifact_name, artifact_version))
             
-            final_dir = os.path.join(settings.STORAGE_PATH, namespace, artifact_name, artifact_version)
-            os.makedirs(final_dir, exist_ok=True)
-            dest_file_path = os.path.join(final_dir, filename)
+            digest = sha256 or self.artifact_store.ingest(file_path)
+            dest_file_path = os.path.join(settings.STORAGE_PATH, namespace, artifact_name, artifact_version, filename)
+            if settings.PRECOMPRESS_CWL:
+                try:
+                    self.artifact_store.write_variants(digest)
+                except OSError as e:
+                    # Downloads fall back to the uncompressed file
+                    logger.warning(f"Unable to store compressed variants of {digest}: {e}")
 
-            shutil.copy(file_path, dest_file_path)
-
-            # Create or update package
-            package, created = self.get_or_create_package(
+            registered = self.register_package_version(
                 namespace=namespace,
                 artifact_name=artifact_name,
-                job_id=job_id
+                artifact_version=artifact_version,
+                job_id=job_id,
+                cwl_url=dest_file_path,
+                docker_image=docker_image,
+                sha256=digest
             )
-
-            try:
-                package_version, version_created = self.update_or_create_version(
-                    application_package=package,
-                    artifact_version=artifact_version,
-                    cwl_id=artifact_name,
-                    cwl_url=dest_file_path,
-                    docker_image=docker_image,
-                    published=False,
-                    cwl_version=None,
-                    uploader=None,
-                )
-            except ValueError as e:
-                self._handle_version_exists(job_id, package, artifact_version)
-                return
-
-            self._handle_successful_processing(job_id)
+            if registered:
+                # Reference the stored blob from the version path rather than copying it. Only
+                # once the registration is accepted, so a published version keeps its file.
+                self.artifact_store.link(digest, dest_file_path)
 
         except Exception as e:
             self._handle_processing_error(job_id, e)
 
+    def register_package_version(self, namespace: str, artifact_name: str, artifact_version: str, job_id: str,
+                                 cwl_url: str, docker_image: str, sha256: str = None) -> bool:
+        """Record the package and version in the catalog and complete the job.
+
+        Returns False, with the job failed, when the version is already
+        published. Subclasses backed by a database that supports upserts can override this
+        to do it in a single transaction.
+        """
+        package, created = self.get_or_create_package(
+            namespace=namespace,
+            artifact_name=artifact_name,
+            job_id=job_id
+        )
+
+        try:
+            package_version, version_created = self.update_or_create_version(
+                application_package=package,
+                artifact_version=artifact_version,
+                cwl_id=artifact_name,
+                cwl_url=cwl_url,
+                docker_image=docker_image,
+                published=False,
+                cwl_version=None,
+                uploader=None,
+                sha256=sha256,
+            )
+        except ValueError as e:
+            self._handle_version_exists(job_id, package, artifact_version)
+            return False
+
+        self._handle_successful_processing(job_id)
+        return True
+
     # Abstract methods to be implemented by subclasses
     def get_or_create_package(self, namespace: str, artifact_name: str, job_id: str):
         raise NotImplementedError("Subclasses must implement get_or_create_package")
@@ -208,12 +441,26 @@ class BaseApplicationPackageService:
 
     def update_or_create_version(self, application_package, artifact_version: str, cwl_id: str, 
                                 cwl_url: str, docker_image: str, published=False, cwl_version: str = None, 
-                                uploader: str = None):
+                                uploader: str = None, sha256: str = None):
         raise NotImplementedError("Subclasses must implement update_or_create_version")
 
     def get_package(self, namespace: str, artifact_name: str):
         raise NotImplementedError("Subclasses must implement get_package")
 
+    def get_package_details(self, namespace: str, artifact_name: str, version: Optional[str] = None):
+        raise NotImplementedError("Subclasses must implement get_package_details")
+
+    # Lookups for async routes. By default the blocking lookup runs in the
+    # threadpool; subclasses with an asyncio client override these.
+    async def get_package_async(self, namespace: str, artifact_name: str):
+        return await run_in_threadpool(self.get_package, namespace, artifact_name)
+
+    async def get_application_package_version_async(self, application_package, artifact_version: str):
+        return await run_in_threadpool(self.get_application_package_version, application_package, artifact_version)
+
+    async def get_package_details_async(self, namespace: str, artifact_name: str, version: Optional[str] = None):
+        return await run_in_threadpool(self.get_package_details, namespace, artifact_name, version)
+
     def _handle_version_exists(self, job_id: str, package, artifact_version: str):
         raise NotImplementedError("Subclasses must implement _handle_version_exists")
 
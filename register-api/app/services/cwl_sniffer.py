@@ -0,0 +1,233 @@
+from typing import Iterator, Optional
+
+import yaml
+from yaml.nodes import ScalarNode
+from yaml.events import (
+    AliasEvent,
+    CollectionEndEvent,
+    CollectionStartEvent,
+    Event,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+)
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from app.models.parsed_application_package import ParsedApplicationPackage
+
+VERSION_KEY = "s:softwareVersion"
+
+
+class CWLSniffError(ValueError):
+    """Raised when an upload is obviously not a usable application package."""
+
+
+class _Process:
+    def __init__(self):
+        self.cwl_class: Optional[str] = None
+        self.id: Optional[str] = None
+        self.docker_image: Optional[str] = None
+
+
+def sniff_cwl(file_path: str) -> ParsedApplicationPackage:
+    """
+    Pull the workflow id, s:softwareVersion and DockerRequirement out of a CWL
+    file from the YAML event stream, without building the document.
+
+    Uses the libyaml C parser when it is available. Only the handful of keys
+    needed are read; everything else is skipped event by event.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            events = yaml.parse(f, Loader=SafeLoader)
+            version, cwl_version, processes = _sniff_document(events)
+    except yaml.YAMLError as e:
+        raise CWLSniffError(f"Malformed YAML: {e}")
+
+    if cwl_version is None:
+        raise CWLSniffError("Missing cwlVersion")
+    workflows = [p for p in processes if p.cwl_class == "Workflow"]
+    tools = [p for p in processes if p.cwl_class == "CommandLineTool"]
+    if not workflows or not tools:
+        raise CWLSniffError("Invalid CWL file: missing workflow or tool definition")
+    if not workflows[-1].id:
+        raise CWLSniffError("Invalid CWL workflow: missing or invalid ID")
+    if version is None:
+        raise CWLSniffError(f"Missing {VERSION_KEY}")
+
+    return ParsedApplicationPackage(
+        file_path=file_path,
+        artifact_name=workflows[-1].id.split("#")[-1],
+        artifact_version=version,
+        docker_image=tools[-1].docker_image
+    )
+
+
+def _sniff_document(events: Iterator[Event]):
+    version = None
+    cwl_version = None
+    processes = []
+
+    for event in events:
+        if isinstance(event, (CollectionStartEvent, ScalarEvent, AliasEvent)):
+            break
+    else:
+        raise CWLSniffError("Empty document")
+    if not isinstance(event, MappingStartEvent):
+        raise CWLSniffError("CWL document must be a mapping")
+
+    # A document without $graph is itself a single process
+    top = _Process()
+    for key in _keys(events):
+        if key == VERSION_KEY:
+            version = _version(events)
+        elif key == "cwlVersion":
+            cwl_version = _scalar(events)
+        elif key == "$graph":
+            processes.extend(_graph(events))
+        elif not _read_process_key(key, top, events):
+            _skip(events, next(events))
+    if top.cwl_class:
+        processes.append(top)
+    return version, cwl_version, processes
+
+
+def _keys(events: Iterator[Event]) -> Iterator[Optional[str]]:
+    """Yield the keys of the mapping being read; the caller must consume each value."""
+    for event in events:
+        if isinstance(event, MappingEndEvent):
+            return
+        if isinstance(event, ScalarEvent):
+            yield event.value
+        else:
+            # complex key, not something we look for
+            _skip(events, event)
+            yield None
+
+
+def _scalar(events: Iterator[Event]) -> Optional[str]:
+    event = next(events)
+    if isinstance(event, ScalarEvent):
+        return event.value
+    _skip(events, event)
+    return None
+
+
+def _version(events: Iterator[Event]) -> Optional[str]:
+    """
+    s:softwareVersion as the full parse sees it: the value yaml.safe_load
+    resolves (so 1.10 is the float 1.1), as a string.
+    """
+    event = next(events)
+    if not isinstance(event, ScalarEvent):
+        _skip(events, event)
+        return None
+    loader = SafeLoader("")
+    try:
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(ScalarNode, event.value, event.implicit)
+        value = loader.construct_object(ScalarNode(tag, event.value, style=event.style))
+    finally:
+        loader.dispose()
+    return None if value is None else str(value)
+
+
+def _skip(events: Iterator[Event], event: Event) -> None:
+    """Consume the rest of the node that starts with event."""
+    if not isinstance(event, CollectionStartEvent):
+        return
+    depth = 1
+    for event in events:
+        if isinstance(event, CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, CollectionEndEvent):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _graph(events: Iterator[Event]) -> list:
+    event = next(events)
+    if not isinstance(event, SequenceStartEvent):
+        _skip(events, event)
+        return []
+    processes = []
+    for event in events:
+        if isinstance(event, SequenceEndEvent):
+            break
+        if not isinstance(event, MappingStartEvent):
+            _skip(events, event)
+            continue
+        process = _Process()
+        for key in _keys(events):
+            if not _read_process_key(key, process, events):
+                _skip(events, next(events))
+        processes.append(process)
+    return processes
+
+
+def _read_process_key(key: Optional[str], process: _Process, events: Iterator[Event]) -> bool:
+    """Read the value for key into process if it is one we need."""
+    if key == "class":
+        process.cwl_class = _scalar(events)
+    elif key == "id":
+        process.id = _scalar(events)
+    elif key == "requirements":
+        # hints are ignored, as in BaseApplicationPackageService.extract_docker_image
+        process.docker_image = _docker_pull(events)
+    else:
+        return False
+    return True
+
+
+def _docker_pull(events: Iterator[Event]) -> Optional[str]:
+    """Find DockerRequirement.dockerPull in a requirements mapping or list."""
+    docker_image = None
+    event = next(events)
+    if isinstance(event, MappingStartEvent):
+        # {DockerRequirement: {dockerPull: ...}, ...}
+        for key in _keys(events):
+            value = next(events)
+            if key == "DockerRequirement" and isinstance(value, MappingStartEvent):
+                docker_image = _docker_pull_field(events)
+            else:
+                _skip(events, value)
+    elif isinstance(event, SequenceStartEvent):
+        # [{class: DockerRequirement, dockerPull: ...}, ...]
+        for event in events:
+            if isinstance(event, SequenceEndEvent):
+                break
+            if not isinstance(event, MappingStartEvent):
+                _skip(events, event)
+                continue
+            cwl_class = None
+            pull = None
+            for key in _keys(events):
+                if key == "class":
+                    cwl_class = _scalar(events)
+                elif key == "dockerPull":
+                    pull = _scalar(events)
+                else:
+                    _skip(events, next(events))
+            if cwl_class == "DockerRequirement" and pull:
+                docker_image = pull
+    else:
+        _skip(events, event)
+    return docker_image
+
+
+def _docker_pull_field(events: Iterator[Event]) -> Optional[str]:
+    pull = None
+    for key in _keys(events):
+        if key == "dockerPull":
+            pull = _scalar(events)
+        else:
+            _skip(events, next(events))
+    return pull
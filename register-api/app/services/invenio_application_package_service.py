@@ -1,4 +1,6 @@
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
+import hashlib
+import itertools
 import os
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
@@ -6,23 +8,57 @@ from fastapi.logger import logger
 
 from app.models.application_package import ApplicationPackageDetails
 from app.models.application_package_version import ApplicationPackageVersion
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.models.job import JobStatus
-from app.services.invenio_rdm_service import IvenioRDMService
+from app.services.invenio_rdm_service import AsyncIvenioRDMService, IvenioRDMService
 from app.services.base_application_package_service import BaseApplicationPackageService
 
+# Read-through cache of RDM package and version lookups, shared by the
+# requests of a process. Keys include the token, as RDM filters search results
+# by the caller's access, and a per-package generation: invalidating a package
+# bumps its generation, so entries cached for every token are dropped at once.
+rdm_lookups = TTLCache(settings.RDM_LOOKUP_CACHE_SIZE, settings.RDM_LOOKUP_TTL_SECONDS)
+_generations: Dict[tuple, int] = {}
+_generation_counter = itertools.count(1)
+
+
+def _lookup_ttl(value) -> float:
+    if isinstance(value, ApplicationPackageVersion) and value.published and value.artifact_version != "develop":
+        return settings.RDM_PUBLISHED_TTL_SECONDS
+    return settings.RDM_LOOKUP_TTL_SECONDS
+
+
+def _copy(value):
+    # Callers mutate results (e.g. package.versions.append), never the cached entry
+    return value.model_copy(deep=True) if value is not None else None
+
 
 class ApplicationPackageService(BaseApplicationPackageService):
     def __init__(self, db: Session, token: str):
         super().__init__(db)
         self.token = token
         self.invenio_url = settings.RDM_URL
+        self._token_key = hashlib.sha256(token.encode()).hexdigest() if token else None
+        self.rdm_service = IvenioRDMService(self.invenio_url, self.token)
+        self.async_rdm_service = AsyncIvenioRDMService(self.invenio_url, self.token)
         
         logger.error("Initialized RDM Service with " + self.invenio_url)
     
+    def _package_key(self, namespace: str, artifact_name: str) -> tuple:
+        return (self.invenio_url, namespace, artifact_name)
+
+    def _lookup_key(self, namespace: str, artifact_name: str, *version) -> tuple:
+        package_key = self._package_key(namespace, artifact_name)
+        return package_key + (_generations.get(package_key, 0), self._token_key) + version
+
+    def invalidate_package(self, namespace: str, artifact_name: str) -> None:
+        """Drop the cached lookups of a package and all its versions."""
+        _generations[self._package_key(namespace, artifact_name)] = next(_generation_counter)
+
     def get_cwl_file_path(self, namespace, artifactName, version):
-        package = self.get_package(namespace, artifactName)
-        return package.cwl_url
+        details = self.get_package_details(namespace, artifactName, version)
+        return details.versions[0].cwl_url if details else None
 
     def get_or_create_package(
         self, 
@@ -31,8 +67,11 @@ class ApplicationPackageService(BaseApplicationPackageService):
         job_id: str
     ) -> Tuple[ApplicationPackageDetails, bool]:
         
-        rdm_service = IvenioRDMService(self.invenio_url, self.token)
-        app_package = rdm_service.get_package(namespace, artifact_name)
+        app_package = self.get_package(namespace, artifact_name)
+        if app_package is None:
+            # A cached miss may be stale; never create a duplicate record from one
+            self.invalidate_package(namespace, artifact_name)
+            app_package = self.get_package(namespace, artifact_name)
         if app_package:
             return app_package, False
         
@@ -42,9 +81,13 @@ class ApplicationPackageService(BaseApplicationPackageService):
     
 
     def get_application_package_version(self, application_package: ApplicationPackageDetails, artifact_version: str):
-        rdm_service = IvenioRDMService(self.invenio_url, self.token)
-        version = rdm_service.get_package_version(application_package.namespace, application_package.artifactName, artifact_version)
-        return version
+        namespace, artifact_name = application_package.namespace, application_package.artifactName
+        version = rdm_lookups.get_or_load(
+            self._lookup_key(namespace, artifact_name, artifact_version),
+            lambda: self.rdm_service.get_package_version(namespace, artifact_name, artifact_version),
+            _lookup_ttl
+        )
+        return _copy(version)
 
     def update_or_create_version(self, 
                 application_package: ApplicationPackageDetails,
@@ -55,11 +98,15 @@ class ApplicationPackageService(BaseApplicationPackageService):
                 published=False,
                 cwl_version: str = None,
                 uploader: str = None,
-
+                sha256: str = None,
             ) -> Tuple[ApplicationPackageVersion, bool]:
         
         """Get existing package or create a new one."""
         app_package_version = self.get_application_package_version(application_package, artifact_version)
+        if app_package_version is None or not app_package_version.published:
+            # Only a published version is final; recheck anything else before writing
+            self.invalidate_package(application_package.namespace, application_package.artifactName)
+            app_package_version = self.get_application_package_version(application_package, artifact_version)
 
         if app_package_version:
             if app_package_version.published:
@@ -76,7 +123,13 @@ class ApplicationPackageService(BaseApplicationPackageService):
             cwl_version=cwl_version,
             uploader=uploader
         )
-        IvenioRDMService(self.invenio_url, self.token).add_package_version(app_package_version)
+        try:
+            # add_package_version also publishes the new record
+            # The version path is only linked once registered; the blob holds the same bytes
+            self.rdm_service.add_package_version(
+                app_package_version, self.artifact_store.blob_path(sha256) if sha256 else None)
+        finally:
+            self.invalidate_package(application_package.namespace, application_package.artifactName)
 
         return app_package_version, True
 
@@ -91,7 +144,50 @@ class ApplicationPackageService(BaseApplicationPackageService):
         )
 
     def get_package(self, namespace: str, artifact_name: str) -> Optional[ApplicationPackageDetails]:
-        return IvenioRDMService(self.invenio_url, self.token).get_package(namespace=namespace, package_name=artifact_name)
+        package = rdm_lookups.get_or_load(
+            self._lookup_key(namespace, artifact_name),
+            lambda: self.rdm_service.get_package(namespace=namespace, package_name=artifact_name)
+        )
+        return _copy(package)
+
+    def get_package_details(self, namespace: str, artifact_name: str,
+                            version: Optional[str] = None) -> Optional[ApplicationPackageDetails]:
+        package = self.get_package(namespace, artifact_name)
+        if package is None or version is None:
+            return package
+        package_version = self.get_application_package_version(package, version)
+        if package_version is None:
+            return None
+        package.versions.append(package_version)
+        return package
+
+    async def get_package_async(self, namespace: str, artifact_name: str) -> Optional[ApplicationPackageDetails]:
+        package = await rdm_lookups.get_or_load_async(
+            self._lookup_key(namespace, artifact_name),
+            lambda: self.async_rdm_service.get_package(namespace, artifact_name)
+        )
+        return _copy(package)
+
+    async def get_application_package_version_async(self, application_package: ApplicationPackageDetails,
+                                                    artifact_version: str) -> Optional[ApplicationPackageVersion]:
+        namespace, artifact_name = application_package.namespace, application_package.artifactName
+        version = await rdm_lookups.get_or_load_async(
+            self._lookup_key(namespace, artifact_name, artifact_version),
+            lambda: self.async_rdm_service.get_package_version(namespace, artifact_name, artifact_version),
+            _lookup_ttl
+        )
+        return _copy(version)
+
+    async def get_package_details_async(self, namespace: str, artifact_name: str,
+                                        version: Optional[str] = None) -> Optional[ApplicationPackageDetails]:
+        package = await self.get_package_async(namespace, artifact_name)
+        if package is None or version is None:
+            return package
+        package_version = await self.get_application_package_version_async(package, version)
+        if package_version is None:
+            return None
+        package.versions.append(package_version)
+        return package
 
         
 
@@ -1,8 +1,13 @@
+import hashlib
+import itertools
 import string
-from typing import Optional, Tuple
+import threading
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
 import os
 from datetime import datetime, timezone
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from fastapi.logger import logger
 import logging
 from types import SimpleNamespace
@@ -10,12 +15,74 @@ from types import SimpleNamespace
 
 from app.models.application_package import ApplicationPackageDetails, ApplicationPackageVersion
 from app.models.job import Job, JobStatus
+from app.core.cache import TTLCache
 from app.core.config import settings
 from ap_validator.app_package import AppPackage
 import json
 
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
 
-class IvenioRDMService:
+
+def get_session() -> requests.Session:
+    """
+    Process-wide HTTP session for RDM calls. Connections are pooled and kept
+    alive across requests and users, so consecutive calls skip the TCP and
+    TLS handshakes; auth headers are sent per request, never stored on it.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=settings.RDM_POOL_CONNECTIONS,
+                                      pool_maxsize=settings.RDM_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def close_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+# (invenio_root, namespace, generation, token digest) -> community id, or None for
+# unknown communities. RDM answers with what the caller may see, so entries are
+# per token; invalidating bumps the namespace's generation, dropping them all.
+community_ids = TTLCache(settings.RDM_COMMUNITY_CACHE_SIZE, settings.RDM_COMMUNITY_TTL_SECONDS,
+                         settings.RDM_COMMUNITY_NEGATIVE_TTL_SECONDS)
+_community_generations: Dict[tuple, int] = {}
+_community_generation_counter = itertools.count(1)
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Process-wide asyncio HTTP client for RDM calls, pooled like get_session()."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=settings.RDM_POOL_SIZE, max_keepalive_connections=settings.RDM_POOL_SIZE),
+            timeout=httpx.Timeout(settings.RDM_READ_TIMEOUT, connect=settings.RDM_CONNECT_TIMEOUT),
+            verify=False
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+    _async_client = None
+
+
+class _RDMRecords:
+    """Requests and responses of the RDM records API, shared by the sync and async clients."""
 
     # # Uncomment this block if you'd like way too much info on the http requests being made to RDM
 
@@ -47,18 +114,40 @@ class IvenioRDMService:
             "Authorization": f"Bearer {self.token}"
         }   
 
+    def _records_url(self, namespace) -> str:
+        return f'{self.invenio_root}/api/communities/{namespace}/records'
 
-    def get_package(self, namespace, package_name) -> ApplicationPackageDetails:
-        logger.error(f"fetching {namespace}/{package_name}")
-        query_string = f"metadata.title:\"{package_name}\""  
-        params = {
-            "q":query_string
-        }
-        headers = {
-            "Authorization":f"Bearer {self.token}"
-        }
-        resp = requests.get(f'{self.invenio_root}/api/communities/{namespace}/records', params=params, headers=self.h, verify=False)
-        community_items = resp.json()['hits']['hits']
+    def _community_url(self, namespace) -> str:
+        return f'{self.invenio_root}/api/communities/{namespace}'
+
+    def _community_key(self, namespace) -> tuple:
+        namespace_key = (self.invenio_root, namespace)
+        token_key = hashlib.sha256(self.token.encode()).hexdigest() if self.token else None
+        return namespace_key + (_community_generations.get(namespace_key, 0), token_key)
+
+    def invalidate_community_id(self, namespace) -> None:
+        """Drop the cached community id of namespace for every token."""
+        _community_generations[(self.invenio_root, namespace)] = next(_community_generation_counter)
+
+    @staticmethod
+    def _parse_community_id(resp):
+        # Unknown communities are cached as None; other failures raise so they are not cached
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()['id']
+
+    def _local_url(self, link: str) -> str:
+        # when running invenvio locally (127.0.0.1), we cannot use these as we need to address `self.invenio_root` and not 127.0.0.1
+        return link.replace("https://127.0.0.1:5000", self.invenio_root)
+
+    @staticmethod
+    def _package_params(package_name) -> dict:
+        return {"q": f"metadata.title:\"{package_name}\""}
+
+    @staticmethod
+    def _parse_package(namespace, package_name, body) -> Optional[ApplicationPackageDetails]:
+        community_items = body['hits']['hits']
         if len(community_items) > 1:
             logger.error("too many packages returned?!")
             raise ValueError("Multiple Pacakges found with title in given namespace")
@@ -67,49 +156,32 @@ class IvenioRDMService:
             return None
         else:
             return ApplicationPackageDetails.from_rdm_package(community_items[0])
-    
 
-    def get_community_id(self, namespace):
-        headers = {
-            "Authorization":f"Bearer {self.token}"
-        }
-        resp = requests.get(f'{self.invenio_root}/api/communities/{namespace}', headers=headers, verify=False)
-        if resp.status_code == 200:
-            return resp.json()['id']
-        elif resp.status_code == 404:
-            return None
-
-
-    def get_package_version(self, namespace, package_name, package_version=None) -> ApplicationPackageDetails:
+    @staticmethod
+    def _version_params(package_name, package_version=None) -> dict:
         query_string = f"metadata.title:\"{package_name}\""
         params = {}
-        # if package version is specified, add it here.
+        # if package version is specified, search all versions for exactly that one
         if package_version:
-            query_string = query_string + f" metadata.version:\"{package_version}\""
+            query_string = query_string + f" AND metadata.version:\"{package_version}\""
             params['allversions']='true'
-            params['size']=100
+            params['size']=settings.RDM_VERSION_PAGE_SIZE
+            params['sort']='newest'
 
         params['q'] = query_string
-            
-        headers = {
-            "Authorization":f"Bearer {self.token}"
-        }
-        resp = requests.get(f'{self.invenio_root}/api/communities/{namespace}/records', params=params, headers=headers, verify=False)
-        community_items = resp.json()['hits']['hits']
-        if  len(community_items) == 0:
-            return None
-        else:
-            for item in community_items:
-                if item['metadata']['version'] == package_version:
-                    app_package_version = ApplicationPackageVersion.from_rdm_package_version(item)
-                    return app_package_version
-            
-            return None
+        return params
 
-    def add_package_version(self, app_package_version: ApplicationPackageVersion):
-        # Setup the requests
+    def _next_page(self, body) -> Optional[str]:
+        next_link = body.get('links', {}).get('next')
+        return self._local_url(next_link) if next_link else None
 
+    @staticmethod
+    def _is_version(item, package_version) -> bool:
+        # the search matches phrases, so similar versions (1.0 and 1.0.1) may be hits too
+        return item['metadata']['version'] == package_version
 
+    @staticmethod
+    def _record_data(app_package_version: ApplicationPackageVersion, community_id) -> dict:
         current_module_dir = os.path.dirname(__file__)
 
         # Construct the absolute path to the file
@@ -127,7 +199,7 @@ class IvenioRDMService:
             user = app_package_version.uploader
 
 
-        data['parent']['review']['receiver']['community'] = self.get_community_id(app_package_version.app_package.namespace)
+        data['parent']['review']['receiver']['community'] = community_id
         data['metadata']['creators'][0]['person_or_org']['family_name'] = user
         data['metadata']['title'] = app_package_version.app_package.artifactName
         data['metadata']['version'] = app_package_version.artifact_version
@@ -135,12 +207,63 @@ class IvenioRDMService:
 
         logger.error(data)
         logger.error(json.dumps(data))
+        return data
+
+
+class IvenioRDMService(_RDMRecords):
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request over the shared session with the configured timeouts."""
+        kwargs.setdefault("timeout", (settings.RDM_CONNECT_TIMEOUT, settings.RDM_READ_TIMEOUT))
+        return get_session().request(method, url, verify=False, **kwargs)
+
+
+    def get_package(self, namespace, package_name) -> ApplicationPackageDetails:
+        logger.error(f"fetching {namespace}/{package_name}")
+        resp = self._request("GET", self._records_url(namespace), params=self._package_params(package_name), headers=self.h)
+        return self._parse_package(namespace, package_name, resp.json())
+    
+
+    def get_community_id(self, namespace):
+        def load():
+            headers = {
+                "Authorization":f"Bearer {self.token}"
+            }
+            return self._parse_community_id(self._request("GET", self._community_url(namespace), headers=headers))
+
+        return community_ids.get_or_load(self._community_key(namespace), load)
+
+
+    def _iter_hits(self, url, params, headers) -> Iterator[dict]:
+        """Hits of a search, requesting the following pages only as they are consumed."""
+        resp = self._request("GET", url, params=params, headers=headers)
+        while True:
+            body = resp.json()
+            yield from body['hits']['hits']
+            next_url = self._next_page(body)
+            if next_url is None:
+                return
+            resp = self._request("GET", next_url, headers=headers)
+
+    def get_package_version(self, namespace, package_name, package_version=None) -> ApplicationPackageDetails:
+        headers = {
+            "Authorization":f"Bearer {self.token}"
+        }
+        hits = self._iter_hits(self._records_url(namespace), self._version_params(package_name, package_version), headers)
+        for item in hits:
+            if self._is_version(item, package_version):
+                return ApplicationPackageVersion.from_rdm_package_version(item)
+        return None
+
+    def add_package_version(self, app_package_version: ApplicationPackageVersion, file_path: Optional[str] = None):
+        """Create or version the RDM record; the file is read from file_path, if given, and named after cwl_url."""
+        namespace = app_package_version.app_package.namespace
+        data = self._record_data(app_package_version, self.get_community_id(namespace))
 
         #if the app package already exists, create a new version
         if app_package_version.app_package.id is not None:
             logger.error("Package exists, creating new version")
-            r = requests.post(
-                f"{self.invenio_root}/api/records/{app_package_version.app_package.id}/versions", headers=self.h, verify=False)
+            r = self._request("POST", f"{self.invenio_root}/api/records/{app_package_version.app_package.id}/versions", headers=self.h)
             assert r.status_code == 201, \
                 f"Failed to create new record version (code: {r.status_code}, response: {r.json()})"
             links = r.json()['links']
@@ -150,8 +273,10 @@ class IvenioRDMService:
 
             # now add the metadata to the new draft
             # Create a new record
-            r = requests.put(
-                f"{self.invenio_root}/api/records/{new_rev_id}/draft", data=json.dumps(data), headers=self.h, verify=False)
+            r = self._request("PUT", f"{self.invenio_root}/api/records/{new_rev_id}/draft", data=json.dumps(data), headers=self.h)
+            if r.status_code != 200:
+                # the cached community may have been deleted or recreated
+                self.invalidate_community_id(namespace)
             assert r.status_code == 200, \
                 f"Failed to update draft  record (code: {r.status_code}, response: {r.json()})"
             links = r.json()['links']
@@ -161,8 +286,9 @@ class IvenioRDMService:
         else:
             # Create a new record
             logger.error("Package does not exists, creating new pacakge and version")
-            r = requests.post(
-                f"{self.invenio_root}/api/records", data=json.dumps(data), headers=self.h, verify=False)
+            r = self._request("POST", f"{self.invenio_root}/api/records", data=json.dumps(data), headers=self.h)
+            if r.status_code != 201:
+                self.invalidate_community_id(namespace)
             assert r.status_code == 201, \
                 f"Failed to create new record (code: {r.status_code}, response: {r.json()})"
             links = r.json()['links']
@@ -172,35 +298,70 @@ class IvenioRDMService:
         # Initiate the file
         f = app_package_version.cwl_url
         data = json.dumps([{"key": os.path.basename(f)}])
-        r = requests.post(links["files"].replace("https://127.0.0.1:5000", self.invenio_root), data=data, headers=self.h, verify=False)
+        r = self._request("POST", self._local_url(links["files"]), data=data, headers=self.h)
         logger.error(r.json())
         assert r.status_code == 201, \
             f"Failed to create file {f} (code: {r.status_code})"
         
-        # when running invenvio locally (127.0.0.1), we cannot use these as we need to address `self.invenio_root` and not 127.0.0.1
         file_links = r.json()["entries"][0]["links"]
 
         # Upload file content by streaming the data
-        with open(f, 'rb') as fp:
-            r = requests.put(
-                file_links["content"].replace("https://127.0.0.1:5000", self.invenio_root), data=fp, headers=self.fh, verify=False)
+        with open(file_path or f, 'rb') as fp:
+            r = self._request("PUT", self._local_url(file_links["content"]), data=fp, headers=self.fh)
         assert r.status_code == 200, \
             f"Failed to upload file contet {f} (code: {r.status_code})"
 
         # Commit the file.
-        r = requests.post(file_links["commit"].replace("https://127.0.0.1:5000", self.invenio_root), headers=self.h, verify=False)
+        r = self._request("POST", self._local_url(file_links["commit"]), headers=self.h)
         assert r.status_code == 200, \
             f"Failed to commit file {f} (code: {r.status_code})"
         
         # Publish the package?
         # for RDM, this makes sense as it's not "viewable" outside the initial user unless its published.
-        r = requests.post(links["publish"].replace("https://127.0.0.1:5000", self.invenio_root), headers=self.h, verify=False)
+        r = self._request("POST", self._local_url(links["publish"]), headers=self.h)
         logger.error(r.json())
         assert r.status_code == 202, \
             f"Failed to publish record (code: {r.status_code})"
         # submit files
-            
 
-    
 
-    
+class AsyncIvenioRDMService(_RDMRecords):
+    """
+    asyncio client for the RDM lookups made by async routes, so a worker keeps
+    serving other requests while one waits on RDM. Uses the process-wide
+    httpx.AsyncClient from get_async_client().
+    """
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await get_async_client().request(method, url, **kwargs)
+
+    async def get_package(self, namespace, package_name) -> Optional[ApplicationPackageDetails]:
+        resp = await self._request("GET", self._records_url(namespace), params=self._package_params(package_name), headers=self.h)
+        return self._parse_package(namespace, package_name, resp.json())
+
+    async def get_community_id(self, namespace):
+        async def load():
+            resp = await self._request("GET", self._community_url(namespace), headers={"Authorization": f"Bearer {self.token}"})
+            return self._parse_community_id(resp)
+
+        return await community_ids.get_or_load_async(self._community_key(namespace), load)
+
+    async def _iter_hits(self, url, params, headers) -> AsyncIterator[dict]:
+        resp = await self._request("GET", url, params=params, headers=headers)
+        while True:
+            body = resp.json()
+            for item in body['hits']['hits']:
+                yield item
+            next_url = self._next_page(body)
+            if next_url is None:
+                return
+            resp = await self._request("GET", next_url, headers=headers)
+
+    async def get_package_version(self, namespace, package_name, package_version=None) -> Optional[ApplicationPackageVersion]:
+        hits = self._iter_hits(self._records_url(namespace), self._version_params(package_name, package_version),
+                               {"Authorization": f"Bearer {self.token}"})
+        async for item in hits:
+            if self._is_version(item, package_version):
+                await hits.aclose()
+                return ApplicationPackageVersion.from_rdm_package_version(item)
+        return None
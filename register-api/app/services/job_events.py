@@ -0,0 +1,185 @@
+"""
+Job change notifications for the long-poll and SSE job status endpoints.
+
+Waiting clients subscribe to a job id and are woken when the job's row
+changes, then re-read it once, instead of each client polling the database.
+
+On Postgres a trigger on the jobs table (see the job_notify migration) sends
+NOTIFY job_status with the job id for every insert and update, including
+those made by ingest workers in other processes; the API process LISTENs on a
+single connection and wakes the subscribers. A background task checks that
+connection every JOB_EVENTS_KEEPALIVE_SECONDS and reconnects with backoff when
+it is lost; until it is back, changes are published in-process and every
+subscriber is woken on each tick to re-read, since notifications from other
+processes are missed. On other databases changes are only published
+in-process by the job progress writer.
+"""
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager, suppress
+from typing import Any, Dict, Iterator, Optional, Set
+
+from fastapi.logger import logger
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.database import async_engine
+
+CHANNEL = "job_status"
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_listener: Optional[AsyncConnection] = None
+# The asyncpg connection under _listener
+_driver: Optional[Any] = None
+_supervisor: Optional[asyncio.Task] = None
+# Set when the LISTEN connection reports it was terminated
+_lost: Optional[asyncio.Event] = None
+_subscribers: Dict[str, Set[asyncio.Event]] = defaultdict(set)
+
+
+async def start() -> None:
+    """Bind the broker to the running event loop and LISTEN on Postgres."""
+    global _loop, _lost, _supervisor
+    _loop = asyncio.get_running_loop()
+    _lost = asyncio.Event()
+    if async_engine.dialect.name != "postgresql":
+        return
+    try:
+        await _listen()
+    except Exception as e:
+        logger.warning(f"Could not LISTEN for job changes, retrying in the background: {e}")
+    _supervisor = asyncio.create_task(_supervise())
+
+
+async def shutdown() -> None:
+    global _loop, _supervisor
+    if _supervisor is not None:
+        _supervisor.cancel()
+        with suppress(asyncio.CancelledError):
+            await _supervisor
+    _supervisor = None
+    await _drop_listener()
+    _loop = None
+
+
+async def _listen() -> None:
+    global _listener, _driver
+    connection = await async_engine.connect()
+    try:
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+        await driver.add_listener(CHANNEL, _on_notify)
+        driver.add_termination_listener(_on_terminate)
+    except BaseException:
+        await _discard(connection)
+        raise
+    _listener, _driver = connection, driver
+
+
+async def _supervise() -> None:
+    """Health-check the LISTEN connection and re-establish it with backoff when it is lost."""
+    loop = asyncio.get_running_loop()
+    backoff = settings.JOB_EVENTS_RECONNECT_MIN_SECONDS
+    retry_at = 0.0
+    while True:
+        tick = settings.JOB_EVENTS_KEEPALIVE_SECONDS
+        if _listener is None:
+            # Changes from other processes go unnoticed meanwhile, so every waiter re-reads
+            _wake_all()
+            if loop.time() >= retry_at:
+                try:
+                    await _listen()
+                except Exception as e:
+                    logger.warning(f"Could not LISTEN for job changes, retrying in {backoff:g}s: {e}")
+                    retry_at = loop.time() + backoff
+                    backoff = min(backoff * 2, settings.JOB_EVENTS_RECONNECT_MAX_SECONDS)
+                else:
+                    logger.info("Listening for job changes again")
+                    backoff = settings.JOB_EVENTS_RECONNECT_MIN_SECONDS
+                    # Whatever changed before LISTEN was back was never notified
+                    _wake_all()
+            if _listener is None:
+                tick = max(min(tick, retry_at - loop.time()), 0)
+        elif not await _healthy():
+            logger.warning("Lost the LISTEN connection for job changes, reconnecting")
+            await _drop_listener()
+            continue
+        try:
+            await asyncio.wait_for(_lost.wait(), tick)
+        except asyncio.TimeoutError:
+            pass
+        _lost.clear()
+
+
+async def _healthy() -> bool:
+    try:
+        await asyncio.wait_for(_driver.execute("SELECT 1"), settings.JOB_EVENTS_KEEPALIVE_SECONDS)
+        return True
+    except Exception:
+        return False
+
+
+async def _drop_listener() -> None:
+    global _listener, _driver
+    connection, _listener, _driver = _listener, None, None
+    if connection is not None:
+        await _discard(connection)
+
+
+async def _discard(connection: AsyncConnection) -> None:
+    # Invalidated rather than returned to the pool, where it would keep its listeners
+    with suppress(Exception):
+        await connection.invalidate()
+    with suppress(Exception):
+        await connection.close()
+
+
+def _on_terminate(connection) -> None:
+    if _lost is not None:
+        _lost.set()
+
+
+def _on_notify(connection, pid, channel, payload) -> None:
+    _wake(payload)
+
+
+def _wake(job_id: str) -> None:
+    for event in _subscribers.get(job_id, ()):
+        event.set()
+
+
+def _wake_all() -> None:
+    for events in _subscribers.values():
+        for event in events:
+            event.set()
+
+
+@contextmanager
+def subscribe(job_id: str) -> Iterator[asyncio.Event]:
+    """Event set whenever job_id changes; clear it before re-reading the job."""
+    event = asyncio.Event()
+    _subscribers[job_id].add(event)
+    try:
+        yield event
+    finally:
+        _subscribers[job_id].discard(event)
+        if not _subscribers[job_id]:
+            del _subscribers[job_id]
+
+
+def publish(job_id: str) -> None:
+    """
+    Wake the subscribers of job_id. Safe to call from any thread; a no-op
+    when Postgres already delivers the change or no broker is running.
+    """
+    loop = _loop
+    if loop is None or _listener is not None:
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        _wake(job_id)
+    else:
+        loop.call_soon_threadsafe(_wake, job_id)
@@ -0,0 +1,59 @@
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+from app.services import job_events
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+
+class JobProgressWriter:
+    """
+    Writes a job's status, message and progress with a single UPDATE per
+    change, without selecting the row first.
+
+    The last written state is kept in memory. Status transitions are written
+    immediately; progress ticks that keep the same status are coalesced and
+    written at most once every min_interval seconds, with the latest tick
+    carried by the next write or flush().
+    """
+
+    def __init__(self, db: Session, job_id: str, status: Optional[JobStatus] = None,
+                 min_interval: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.db = db
+        self.job_id = job_id
+        self.min_interval = settings.JOB_PROGRESS_MIN_INTERVAL_SECONDS if min_interval is None else min_interval
+        self.clock = clock
+        # State of the row as last written (or as claimed)
+        self.status = status
+        self._last_write = clock() if status is not None else None
+        self._pending: Optional[dict] = None
+
+    def update(self, status: JobStatus, message: str, progress: int = 0) -> None:
+        self._pending = {"status": status, "message": message, "progress": progress}
+        if (status != self.status
+                or status in TERMINAL_STATUSES
+                or self._last_write is None
+                or self.clock() - self._last_write >= self.min_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the latest coalesced tick, if any."""
+        if self._pending is None:
+            return
+        self.db.execute(
+            update(Job).where(Job.id == self.job_id).values(**self._pending)
+        )
+        self.db.commit()
+        job_events.publish(self.job_id)
+        self.status = self._pending["status"]
+        self._pending = None
+        self._last_write = self.clock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
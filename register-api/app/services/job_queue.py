@@ -0,0 +1,133 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from fastapi.logger import logger
+from sqlalchemy import DateTime, and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobQueue:
+    """
+    Durable ingest queue on top of the jobs table.
+
+    Workers claim the oldest pending job with SELECT ... FOR UPDATE SKIP LOCKED
+    and hold it under a lease that is extended by heartbeats. A job whose lease
+    runs out (its worker crashed or hung) becomes claimable again until it has
+    been attempted JOB_MAX_ATTEMPTS times. Leases are set and checked by the
+    database clock, so skew between worker hosts cannot expire a live lease
+    early or keep a dead worker's lease alive.
+    """
+
+    def __init__(self, db: Session, worker_id: Optional[str] = None):
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+
+    @staticmethod
+    def _now():
+        return func.now(type_=DateTime(timezone=True))
+
+    def _lease_until(self):
+        if self.db.get_bind().dialect.name == "sqlite":
+            # No interval type; datetime('now') is the same instant as CURRENT_TIMESTAMP in a statement
+            return func.datetime("now", f"+{settings.JOB_LEASE_SECONDS} seconds", type_=DateTime(timezone=True))
+        return self._now() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+    def claim(self) -> Optional[Job]:
+        """Claim the next available job, or return None if the queue is empty."""
+        while True:
+            job = self.db.query(Job).filter(
+                or_(
+                    Job.status == JobStatus.PENDING,
+                    and_(Job.status == JobStatus.PROCESSING, Job.lease_expires_at < self._now())
+                )
+            ).order_by(Job.created_at).with_for_update(skip_locked=True).first()
+
+            if job is None:
+                self.db.commit()
+                return None
+
+            if job.status == JobStatus.PROCESSING:
+                logger.warning(f"Reclaiming job {job.id} from expired worker {job.worker_id}")
+
+            job.attempts = (job.attempts or 0) + 1
+            if job.attempts > settings.JOB_MAX_ATTEMPTS:
+                job.status = JobStatus.FAILED
+                job.message = f"Job abandoned after {settings.JOB_MAX_ATTEMPTS} attempts"
+                job.worker_id = None
+                job.lease_expires_at = None
+                self.db.commit()
+                continue
+
+            job.status = JobStatus.PROCESSING
+            job.worker_id = self.worker_id
+            job.heartbeat_at = self._now()
+            job.lease_expires_at = self._lease_until()
+            self.db.commit()
+            return job
+
+    def heartbeat(self, job_id: str) -> bool:
+        """Extend the lease on a claimed job. Returns False if the job was lost."""
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.worker_id == self.worker_id, Job.status == JobStatus.PROCESSING)
+            .values(heartbeat_at=self._now(), lease_expires_at=self._lease_until())
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def release(self, job_id: str) -> None:
+        """Drop the lease on a job this worker has finished with."""
+        self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.worker_id == self.worker_id)
+            .values(lease_expires_at=None)
+        )
+        self.db.commit()
+
+
+class Heartbeat:
+    """
+    Context manager that keeps a claimed job's lease alive from a background
+    thread, using its own session.
+    """
+
+    def __init__(self, session_factory, job_id: str, worker_id: str):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id}", daemon=True)
+
+    def _run(self) -> None:
+        db = self.session_factory()
+        try:
+            queue = JobQueue(db, self.worker_id)
+            while not self._stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+                try:
+                    if not queue.heartbeat(self.job_id):
+                        logger.error(f"Lost lease on job {self.job_id}")
+                        return
+                except Exception as e:
+                    logger.error(f"Heartbeat for job {self.job_id} failed: {e}")
+                    db.rollback()
+        finally:
+            db.close()
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
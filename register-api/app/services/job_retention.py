@@ -0,0 +1,185 @@
+import io
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, TextIO
+
+from fastapi.logger import logger
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job, JobArchive, JobStatus
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+# Columns carried over to jobs_archive
+ARCHIVED_COLUMNS = [column.name for column in JobArchive.__table__.columns if column.name != "archived_at"]
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"jobs_{month:%Y_%m}"
+
+
+class JobRetention:
+    """
+    Retention for the jobs table.
+
+    On Postgres, jobs is range-partitioned by created_at into monthly
+    partitions (see the partition_jobs migration). Finished jobs older than
+    JOB_RETENTION_DAYS are moved in batches into jobs_archive, optionally
+    also written to a JSONL export, and partitions left empty are dropped so
+    live lookups only touch a few small partitions. Job ids carry no creation
+    time, so a lookup by id probes the id index of every partition; keeping
+    the partition count small is what keeps those lookups cheap. Archiving is
+    portable; partition maintenance is a no-op on other databases.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @property
+    def partitioned(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def ensure_partitions(self, months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+        """
+        Create the monthly partitions from this month to months_ahead months
+        out, returning the ones in place. A month that cannot be created is
+        logged and skipped, so the rest of the retention run still goes ahead.
+        """
+        if not self.partitioned:
+            return []
+        months_ahead = settings.JOB_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        month = _month_start(today or datetime.now(timezone.utc).date())
+        created = []
+        for _ in range(months_ahead + 1):
+            name = partition_name(month)
+            try:
+                self._create_partition(name, month, _next_month(month))
+                created.append(name)
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                logger.error(f"Unable to create job partition {name}: {e}")
+            month = _next_month(month)
+        return created
+
+    def _create_partition(self, name: str, start: date, end: date) -> None:
+        if self.db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+            return
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        in_range = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+        default_has_rows = (
+            self.db.execute(text("SELECT to_regclass('jobs_default')")).scalar() is not None
+            and self.db.execute(text(f"SELECT EXISTS (SELECT 1 FROM jobs_default WHERE {in_range})")).scalar()
+        )
+        if default_has_rows:
+            # Postgres refuses a new partition while the default partition holds rows in its
+            # range (jobs created after the last run overran the partitions made ahead), so the
+            # default is detached, those rows moved into the new partition and the default
+            # reattached, all in one transaction holding the lock on jobs until it commits
+            self.db.execute(text("ALTER TABLE jobs DETACH PARTITION jobs_default"))
+            self.db.execute(text(f"CREATE TABLE {name} PARTITION OF jobs {bounds}"))
+            self.db.execute(text(f"INSERT INTO jobs SELECT * FROM jobs_default WHERE {in_range}"))
+            self.db.execute(text(f"DELETE FROM jobs_default WHERE {in_range}"))
+            self.db.execute(text("ALTER TABLE jobs ATTACH PARTITION jobs_default DEFAULT"))
+        else:
+            self.db.execute(text(f"CREATE TABLE {name} PARTITION OF jobs {bounds}"))
+        self.db.commit()
+
+    def archive(self, older_than_days: Optional[int] = None, export: Optional[TextIO] = None,
+                batch_size: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """Move finished jobs created before the cutoff into jobs_archive; returns how many moved."""
+        older_than_days = settings.JOB_RETENTION_DAYS if older_than_days is None else older_than_days
+        batch_size = batch_size or settings.JOB_ARCHIVE_BATCH_SIZE
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+        columns = [Job.__table__.c[name] for name in ARCHIVED_COLUMNS]
+
+        moved = 0
+        while True:
+            # The created_at bound lets Postgres prune to the old partitions
+            rows = self.db.execute(
+                select(*columns)
+                .where(Job.created_at < cutoff, Job.status.in_(FINISHED_STATUSES))
+                .order_by(Job.created_at)
+                .limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+
+            self.db.execute(insert(JobArchive), [dict(row) for row in rows])
+            self.db.execute(delete(Job).where(Job.id.in_([row["id"] for row in rows]), Job.created_at < cutoff))
+            if export is not None:
+                # Exported before the commit, so a failure never loses archived rows from the
+                # export; a failed commit is rolled back and the batch is exported again next run
+                try:
+                    self._export(rows, export)
+                except Exception:
+                    self.db.rollback()
+                    raise
+            self.db.commit()
+            moved += len(rows)
+
+        logger.info(f"Archived {moved} jobs created before {cutoff.isoformat()}")
+        return moved
+
+    @staticmethod
+    def _export(rows, export: TextIO) -> None:
+        for row in rows:
+            export.write(json.dumps(dict(row), default=_json_default) + "\n")
+        export.flush()
+        try:
+            os.fsync(export.fileno())
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            # not backed by a file, e.g. stdout piped or an in-memory buffer
+            pass
+
+    def drop_empty_partitions(self, older_than_days: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+        """Drop monthly partitions that ended before the cutoff and hold no jobs any more."""
+        if not self.partitioned:
+            return []
+        older_than_days = settings.JOB_RETENTION_DAYS if older_than_days is None else older_than_days
+        cutoff = (today or datetime.now(timezone.utc).date()) - timedelta(days=older_than_days)
+        partitions = self.db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = 'jobs' AND child.relname ~ '^jobs_[0-9]{4}_[0-9]{2}$'"
+        )).scalars().all()
+
+        dropped = []
+        for name in sorted(partitions):
+            month = datetime.strptime(name, "jobs_%Y_%m").date()
+            if _next_month(month) > cutoff:
+                continue
+            if self.db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+                continue
+            self.db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+        self.db.commit()
+        return dropped
+
+    def run(self, older_than_days: Optional[int] = None, export: Optional[TextIO] = None) -> int:
+        self.ensure_partitions()
+        moved = self.archive(older_than_days, export)
+        dropped = self.drop_empty_partitions(older_than_days)
+        if dropped:
+            logger.info(f"Dropped empty job partitions: {', '.join(dropped)}")
+        return moved
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, JobStatus):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
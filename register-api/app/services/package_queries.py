@@ -0,0 +1,202 @@
+"""
+SQL statements for catalog discovery, shared by the sync and async services.
+
+Listings are ordered by (namespace, artifact_name, id) so they can be paged
+with a keyset cursor: the next page starts strictly after the last row of the
+previous one, which stays an index range scan however deep the client pages.
+
+Search (q=) is ranked instead. On Postgres it matches the generated
+search_vector columns and pg_trgm indexes added by the search migration; other
+databases fall back to a case-insensitive substring match.
+
+CWL downloads resolve (namespace, artifact_name, version) to the stored file
+in one query over the two unique indexes. Published versions are immutable,
+so their resolved files are also kept in an in-process LRU.
+"""
+import base64
+import json
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, exists, func, literal_column, or_, select, tuple_
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.application_package_db import ApplicationPackage, ApplicationPackageVersion
+
+PACKAGE_ORDER = (ApplicationPackage.namespace, ApplicationPackage.artifact_name, ApplicationPackage.id)
+
+# Version alias resolving to the most recently published version
+LATEST = "latest"
+
+
+
+class CwlFile(NamedTuple):
+    cwl_url: Optional[str]
+    sha256: Optional[str]
+    published: Optional[bool]
+
+
+# (namespace, artifact_name, version) -> CwlFile of published versions
+# Per process; publish changes elsewhere are picked up once entries expire
+cwl_file_cache = TTLCache(settings.CWL_FILE_CACHE_SIZE, settings.CWL_FILE_CACHE_TTL_SECONDS)
+
+# Generated tsvector columns, maintained by Postgres and not mapped on the models
+PACKAGE_SEARCH_VECTOR = literal_column("application_packages.search_vector")
+VERSION_SEARCH_VECTOR = literal_column("application_package_versions.search_vector")
+
+
+def encode_cursor(package: ApplicationPackage) -> str:
+    """Opaque cursor pointing just after package."""
+    key = [package.namespace, package.artifact_name, package.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(key, list) or len(key) != 3 or not all(isinstance(k, str) for k in key):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return tuple(key)
+
+
+def package_filters(namespace: Optional[str] = None, artifact_name: Optional[str] = None,
+                    published: Optional[bool] = None) -> List:
+    """WHERE clauses for the discovery filters; None means do not filter."""
+    conditions = []
+    if namespace is not None:
+        conditions.append(ApplicationPackage.namespace == namespace)
+    if artifact_name is not None:
+        conditions.append(ApplicationPackage.artifact_name == artifact_name)
+    if published is not None:
+        # A package counts as published once any of its versions is
+        has_published = exists().where(
+            ApplicationPackageVersion.application_package_id == ApplicationPackage.id,
+            ApplicationPackageVersion.published.is_(True)
+        )
+        conditions.append(has_published if published else ~has_published)
+    return conditions
+
+
+def list_packages_statement(namespace: Optional[str] = None, artifact_name: Optional[str] = None,
+                            published: Optional[bool] = None, limit: Optional[int] = None,
+                            cursor: Optional[str] = None, offset: int = 0, with_versions: bool = False) -> Select:
+    """
+    Select packages matching the filters, in keyset order.
+
+    With a cursor the page starts after the cursor's row and offset is
+    ignored; offset is kept for page-number clients. with_versions loads the
+    versions of the whole page in one extra IN query.
+    """
+    statement = select(ApplicationPackage).where(*package_filters(namespace, artifact_name, published))
+    if with_versions:
+        statement = statement.options(selectinload(ApplicationPackage.versions))
+    if cursor is not None:
+        statement = statement.where(tuple_(*PACKAGE_ORDER) > tuple_(*decode_cursor(cursor)))
+    elif offset:
+        statement = statement.offset(offset)
+    statement = statement.order_by(*PACKAGE_ORDER)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def count_packages_statement(namespace: Optional[str] = None, artifact_name: Optional[str] = None,
+                             published: Optional[bool] = None) -> Select:
+    return select(func.count()).select_from(ApplicationPackage).where(
+        *package_filters(namespace, artifact_name, published)
+    )
+
+
+def _contains(column, q: str):
+    """Substring match, served by the pg_trgm GIN indexes on Postgres."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+def search_condition(q: str, dialect: str):
+    """Packages whose name, description, or any version's uploader or docker image match q."""
+    version_match = [
+        _contains(ApplicationPackageVersion.uploader, q),
+        _contains(ApplicationPackageVersion.docker_image, q),
+    ]
+    package_match = [
+        _contains(ApplicationPackage.artifact_name, q),
+        _contains(ApplicationPackage.description, q),
+    ]
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery("simple", q)
+        version_match.append(VERSION_SEARCH_VECTOR.op("@@")(query))
+        package_match.append(PACKAGE_SEARCH_VECTOR.op("@@")(query))
+        # Fuzzy name match above the pg_trgm similarity threshold
+        package_match.append(ApplicationPackage.artifact_name.op("%")(q))
+    return or_(
+        *package_match,
+        exists().where(ApplicationPackageVersion.application_package_id == ApplicationPackage.id, or_(*version_match))
+    )
+
+
+def search_rank(q: str):
+    """Postgres relevance: full-text rank of the package and its best version, plus name similarity."""
+    query = func.websearch_to_tsquery("simple", q)
+    version_rank = select(func.max(func.ts_rank_cd(VERSION_SEARCH_VECTOR, query))).where(
+        ApplicationPackageVersion.application_package_id == ApplicationPackage.id
+    ).scalar_subquery()
+    return (
+        func.ts_rank_cd(PACKAGE_SEARCH_VECTOR, query)
+        + func.coalesce(version_rank, 0)
+        + func.similarity(ApplicationPackage.artifact_name, q)
+    )
+
+
+def search_packages_statement(q: str, dialect: str, namespace: Optional[str] = None,
+                              published: Optional[bool] = None, limit: Optional[int] = None,
+                              offset: int = 0, with_versions: bool = False) -> Select:
+    """Select packages matching q, most relevant first; paged by offset."""
+    statement = select(ApplicationPackage).where(
+        *package_filters(namespace, None, published), search_condition(q, dialect)
+    )
+    if with_versions:
+        statement = statement.options(selectinload(ApplicationPackage.versions))
+    if dialect == "postgresql":
+        statement = statement.order_by(search_rank(q).desc(), *PACKAGE_ORDER)
+    else:
+        statement = statement.order_by(*PACKAGE_ORDER)
+    if offset:
+        statement = statement.offset(offset)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def count_search_statement(q: str, dialect: str, namespace: Optional[str] = None,
+                           published: Optional[bool] = None) -> Select:
+    return select(func.count()).select_from(ApplicationPackage).where(
+        *package_filters(namespace, None, published), search_condition(q, dialect)
+    )
+
+
+def cwl_file_statement(namespace: str, artifact_name: str, version: str) -> Select:
+    """Select (cwl_url, sha256, published) of a version, or of the newest published one for LATEST."""
+    statement = (
+        select(ApplicationPackageVersion.cwl_url, ApplicationPackageVersion.sha256, ApplicationPackageVersion.published)
+        .join(ApplicationPackage, ApplicationPackageVersion.application_package_id == ApplicationPackage.id)
+        .where(ApplicationPackage.namespace == namespace, ApplicationPackage.artifact_name == artifact_name)
+    )
+    if version == LATEST:
+        statement = statement.where(ApplicationPackageVersion.published.is_(True)).order_by(
+            ApplicationPackageVersion.published_date.desc().nulls_last(),
+            ApplicationPackageVersion.created_at.desc()
+        )
+    else:
+        statement = statement.where(ApplicationPackageVersion.artifact_version == version)
+    return statement.limit(1)
+
+
+def cache_cwl_file(namespace: str, artifact_name: str, version: str, cwl_file: Optional[CwlFile]) -> None:
+    """Remember a resolved published version; aliases and drafts can change and are not kept."""
+    if cwl_file is not None and cwl_file.published and version != LATEST:
+        cwl_file_cache.put((namespace, artifact_name, version), cwl_file)
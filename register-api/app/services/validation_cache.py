@@ -0,0 +1,123 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from importlib.metadata import PackageNotFoundError, version
+from typing import List, Optional, Tuple
+
+from fastapi.logger import logger
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.validation_result import ValidationResult
+
+
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+# Results are cached per validator and, since load failures are cached too, per CWL loader
+VALIDATOR_VERSION = ";".join(
+    f"{name}=={_package_version(name)}" for name in ("ogc-ap-validator", "schema-salad", "cwl-utils")
+)
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+_evicted_at = 0.0
+
+
+def stats() -> dict:
+    """Process-wide hit and miss counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+class ValidationCache:
+    """
+    Persistent cache of validator results keyed by upload content and
+    ogc-ap-validator version.
+
+    Holds about VALIDATION_CACHE_MAX_ENTRIES rows: the least recently used are
+    evicted on insert, at most once every VALIDATION_CACHE_EVICT_INTERVAL_SECONDS
+    per process, and a hit refreshes last_used_at only when it is older than
+    VALIDATION_CACHE_TOUCH_SECONDS. A size of 0 disables the cache.
+
+    Each call uses its own short-lived session, so calls can run concurrently
+    in the threadpool; they block on the database and must not be made on the
+    event loop.
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal, validator_version: str = VALIDATOR_VERSION):
+        self.session_factory = session_factory
+        self.validator_version = validator_version
+
+    @property
+    def enabled(self) -> bool:
+        return settings.VALIDATION_CACHE_MAX_ENTRIES > 0
+
+    def get(self, sha256: str) -> Optional[Tuple[bool, List]]:
+        """Return the cached (valid, issues) for the content, if any."""
+        if not self.enabled:
+            return None
+        with self.session_factory() as db:
+            result = db.get(ValidationResult, (sha256, self.validator_version))
+            if result is None:
+                _count("misses")
+                return None
+            _count("hits")
+            now = datetime.now(timezone.utc)
+            last_used_at = result.last_used_at
+            if last_used_at.tzinfo is None:
+                last_used_at = last_used_at.replace(tzinfo=timezone.utc)
+            if now - last_used_at >= timedelta(seconds=settings.VALIDATION_CACHE_TOUCH_SECONDS):
+                result.last_used_at = now
+                db.commit()
+            return result.valid, result.issues or []
+
+    def put(self, sha256: str, valid: bool, issues: List) -> None:
+        if not self.enabled:
+            return
+        with self.session_factory() as db:
+            db.merge(ValidationResult(
+                sha256=sha256,
+                validator_version=self.validator_version,
+                valid=valid,
+                issues=issues,
+                last_used_at=datetime.now(timezone.utc)
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # A concurrent upload of the same content stored the same result first
+                db.rollback()
+                return
+            self._evict(db)
+
+    def _evict(self, db: Session) -> None:
+        """Drop everything older than the newest VALIDATION_CACHE_MAX_ENTRIES rows, if not done recently."""
+        global _evicted_at
+        with _stats_lock:
+            if time.monotonic() - _evicted_at < settings.VALIDATION_CACHE_EVICT_INTERVAL_SECONDS:
+                return
+            _evicted_at = time.monotonic()
+        cutoff = db.execute(
+            select(ValidationResult.last_used_at)
+            .order_by(ValidationResult.last_used_at.desc())
+            .offset(settings.VALIDATION_CACHE_MAX_ENTRIES)
+            .limit(1)
+        ).scalar()
+        if cutoff is None:
+            return
+        result = db.execute(delete(ValidationResult).where(ValidationResult.last_used_at <= cutoff))
+        db.commit()
+        logger.info(f"Evicted {result.rowcount} cached validation results")
@@ -0,0 +1,116 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import schema_salad
+import yaml
+from fastapi.logger import logger
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.parsed_application_package import ParsedApplicationPackage
+from app.services.base_application_package_service import BaseApplicationPackageService
+
+# Smallest package that exercises the CWL loader and cwltool's schema validation.
+_WARMUP_CWL = {
+    "cwlVersion": "v1.2",
+    "$graph": [
+        {
+            "class": "Workflow",
+            "id": "main",
+            "inputs": {},
+            "outputs": {},
+            "steps": {"run": {"run": "#tool", "in": {}, "out": []}},
+        },
+        {
+            "class": "CommandLineTool",
+            "id": "tool",
+            "baseCommand": "true",
+            "inputs": {},
+            "outputs": {},
+        },
+    ],
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+class PackageLoadError(ValueError):
+    """A stored CWL file could not be loaded or quick parsed."""
+
+
+def _warm_worker() -> None:
+    """Load the CWL schemas once when a pool worker starts."""
+    from ap_validator.app_package import AppPackage
+    try:
+        AppPackage(cwl=_WARMUP_CWL).validate_cwl()
+    except Exception as e:
+        logger.warning(f"Validation worker warm up failed: {e}")
+
+
+def _noop() -> None:
+    pass
+
+
+def _load_and_validate(file_path: str, strip: bool = True) -> Tuple[bool, List, Optional[ParsedApplicationPackage]]:
+    """Load, validate and quick parse a stored CWL file.
+
+    Runs inside a pool worker, so the loaded CWL objects are dropped from the
+    returned package unless strip is False; only the extracted name, version
+    and docker image cross back to the API process. Load and quick parse
+    failures raise PackageLoadError.
+    """
+    service = BaseApplicationPackageService(db=None)
+    try:
+        parsed = service.load_package(file_path)
+    except (schema_salad.exceptions.ValidationException, yaml.YAMLError) as e:
+        raise PackageLoadError(str(e))
+
+    is_valid, issues = service.validate_package(file_path, parsed)
+    if not is_valid:
+        return False, issues, None
+
+    try:
+        service.quick_parse(None, None, None, parsed)
+    except (ValueError, AttributeError) as e:
+        raise PackageLoadError(str(e))
+
+    if strip:
+        parsed = parsed.model_copy(update={"workflow": None, "tool": None, "metadata": None, "app_package": None})
+    return is_valid, issues, parsed
+
+
+def start() -> None:
+    """Create the validation pool and pre-spawn its workers."""
+    global _executor
+    if _executor is not None or settings.VALIDATION_POOL_SIZE <= 0:
+        return
+    _executor = ProcessPoolExecutor(
+        max_workers=settings.VALIDATION_POOL_SIZE,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm_worker,
+    )
+    for _ in range(settings.VALIDATION_POOL_SIZE):
+        _executor.submit(_noop)
+    logger.info(f"Started validation pool with {settings.VALIDATION_POOL_SIZE} workers")
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def validate_and_parse(file_path: str) -> Tuple[bool, List, Optional[ParsedApplicationPackage]]:
+    """Validate and parse a stored CWL file without blocking the event loop.
+
+    Uses the process pool when VALIDATION_POOL_SIZE is positive and falls back
+    to the threadpool (keeping the loaded CWL objects) when it is zero.
+    """
+    if settings.VALIDATION_POOL_SIZE <= 0:
+        return await run_in_threadpool(_load_and_validate, file_path, False)
+    start()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _load_and_validate, file_path, True)
@@ -1,23 +1,47 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api.routes import (
     catalog_job,
     application_package,
     cwl_file,
-    discovery
+    discovery,
+    metrics
 )
+from app.core.compression import JSONCompressionMiddleware
+from app.core.database import async_engine
+from app.core.request_limits import BodySizeLimitMiddleware
 from app.core.security import security
+from app.services import invenio_rdm_service, job_events, validation_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validation_pool.start()
+    await job_events.start()
+    yield
+    await job_events.shutdown()
+    validation_pool.shutdown()
+    invenio_rdm_service.close_session()
+    await invenio_rdm_service.close_async_client()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Artifact Catalog API",
     description="API for the NASA Artifact Catalog system that manages OGC application packages (CWL files + Docker containers).",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(JSONCompressionMiddleware)
+app.add_middleware(BodySizeLimitMiddleware)
+
 # Include routers
 app.include_router(catalog_job.router, prefix="/catalog-job")
 app.include_router(application_package.router)
 app.include_router(cwl_file.router, prefix="/cwl")
 app.include_router(discovery.router)
+app.include_router(metrics.router, prefix="/metrics")
 
 if __name__ == "__main__":
     import uvicorn
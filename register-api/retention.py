@@ -0,0 +1,37 @@
+"""
+Job retention.
+
+Moves finished jobs older than JOB_RETENTION_DAYS into jobs_archive, creates
+upcoming monthly partitions of the jobs table and drops partitions left
+empty. Run periodically, e.g. daily from cron:
+
+    python retention.py [--days N] [--export jobs.jsonl]
+"""
+import argparse
+import logging
+
+from app.core.database import SessionLocal
+from app.services.job_retention import JobRetention
+
+# Register the remaining models so the Job relationships resolve
+from app.models import application_package_db  # noqa: F401
+
+
+def run(days: int = None, export_path: str = None) -> int:
+    db = SessionLocal()
+    export = open(export_path, "a") if export_path else None
+    try:
+        return JobRetention(db).run(older_than_days=days, export=export)
+    finally:
+        if export is not None:
+            export.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Archive finished jobs and maintain the jobs partitions.")
+    parser.add_argument("--days", type=int, help="archive finished jobs older than this (default JOB_RETENTION_DAYS)")
+    parser.add_argument("--export", help="also append archived jobs to this JSONL file")
+    args = parser.parse_args()
+    run(days=args.days, export_path=args.export)
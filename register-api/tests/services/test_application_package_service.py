@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
+import io
 import os
+import tarfile
 import uuid
+import zipfile
 import cwl_utils
 import pytest
 from unittest.mock import MagicMock, patch
 from sqlalchemy.orm import Session
 from datetime import datetime
+from fastapi import UploadFile
 
 from app.services.application_package_service import ApplicationPackageService
+from app.services.base_application_package_service import UploadTooLargeError
+from app.services.artifact_store import ArtifactStore
 from app.models.application_package_db import ApplicationPackage
 from app.models.job import Job, JobStatus
+from app.models.catalog_job import CatalogBatchStatus
 from app.core.config import settings
 
 @pytest.fixture
@@ -55,6 +64,36 @@ def test_save_uploaded_file(service):
         mock_file.write.assert_called_once_with(b"content")
         assert file_path == os.path.join(settings.STORAGE_PATH,  "test",job_id, "test.cwl")
 
+def test_save_uploaded_stream(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 4)
+    service.artifact_store = ArtifactStore(str(tmp_path / ".blobs"))
+    content = b"cwlVersion: v1.2\n"
+    upload = UploadFile(file=io.BytesIO(content), filename="test.cwl")
+
+    job_id = str(uuid.uuid4())
+    file_path, sha256, size = asyncio.run(service.save_uploaded_stream("test", job_id, upload, "test.cwl"))
+
+    assert file_path == os.path.join(str(tmp_path), "test", job_id, "test.cwl")
+    assert sha256 == hashlib.sha256(content).hexdigest()
+    assert size == len(content)
+    with open(file_path, "rb") as f:
+        assert f.read() == content
+    assert os.path.samefile(file_path, service.artifact_store.blob_path(sha256))
+
+def test_save_uploaded_stream_too_large(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 4)
+    service.artifact_store = ArtifactStore(str(tmp_path / ".blobs"))
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 8)
+    upload = UploadFile(file=io.BytesIO(b"0123456789"), filename="test.cwl")
+
+    job_id = str(uuid.uuid4())
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(service.save_uploaded_stream("test", job_id, upload, "test.cwl"))
+    assert not os.path.exists(os.path.join(str(tmp_path), "test", job_id))
+    assert os.listdir(os.path.join(str(tmp_path), ".blobs", "tmp")) == []
+
 def test_create_job(service, mock_db):
     job_id = str(uuid.uuid4())
     job = service.create_job(job_id, "test", "test.cwl", "my_artifact", "1.0.0")
@@ -70,14 +109,11 @@ def test_create_job(service, mock_db):
     mock_db.commit.assert_called_once()
 
 def test_update_job_status(service, mock_db):
-    mock_job = MagicMock()
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_job
-    
     service.update_job_status("job_id", JobStatus.COMPLETED, "Done", 100)
     
-    assert mock_job.status == JobStatus.COMPLETED
-    assert mock_job.message == "Done"
-    assert mock_job.progress == 100
+    mock_db.query.assert_not_called()
+    statement = mock_db.execute.call_args.args[0]
+    assert statement.compile().params == {"status": JobStatus.COMPLETED, "message": "Done", "progress": 100, "id_1": "job_id"}
     mock_db.commit.assert_called_once()
 
 def test_parse_cwl_file(service, mock_cwl_workflow, mock_cwl_tool):
@@ -274,4 +310,106 @@ def test_get_package(service, mock_db):
 #     mock_db.query.return_value.filter.return_value.first.return_value = None
     
 #     with pytest.raises(ValueError, match="Application package not found"):
-#         service.update_package_version_publish_status("test", "workflow", "1.0.0", True) 
\ No newline at end of file
+#         service.update_package_version_publish_status("test", "workflow", "1.0.0", True) 
+def test_load_package(service):
+    parsed = service.load_package("tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl")
+
+    assert parsed.workflow is not None
+    assert parsed.tool is not None
+    assert parsed.app_package is not None
+    assert service._extract_artifact_version(parsed.metadata) == "1.0.0"
+
+def test_quick_parse_reuses_parsed_package(service):
+    parsed = service.load_package("tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl")
+    with patch.object(service, 'parse_cwl_file') as mock_parse:
+        artifact_name, artifact_version = service.quick_parse("test", "job_id", "test.cwl", parsed)
+
+    mock_parse.assert_not_called()
+    assert artifact_name == "sardem-sarsen"
+    assert artifact_version == "1.0.0"
+    assert parsed.docker_image == "ghcr.io/maap-project/sardem-sarsen:mlucas_nasa-ogc"
+
+def test_process_application_package_reuses_parsed_package(service):
+    parsed = service.load_package("tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl")
+    service.quick_parse("test", "job_id", "test.cwl", parsed)
+    with patch.object(service, 'parse_cwl_file') as mock_parse, \
+         patch.object(service.artifact_store, 'link'), \
+         patch.object(service, 'get_or_create_package', return_value=(MagicMock(), True)), \
+         patch.object(service, 'update_or_create_version', return_value=(MagicMock(), True)) as mock_version, \
+         patch.object(service, 'update_job_status') as mock_update:
+
+        service.process_application_package("test", "test.cwl", "job_id", sha256="0" * 64, parsed=parsed)
+
+    mock_parse.assert_not_called()
+    assert mock_version.call_args.kwargs["artifact_version"] == "1.0.0"
+    assert mock_version.call_args.kwargs["docker_image"] == "ghcr.io/maap-project/sardem-sarsen:mlucas_nasa-ogc"
+    mock_update.assert_called_with("job_id", JobStatus.COMPLETED, "Application package processed successfully", 100)
+
+def test_process_published_version_keeps_its_file(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "PRECOMPRESS_CWL", False)
+    parsed = service.load_package("tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl")
+    service.quick_parse("test", "job_id", "test.cwl", parsed)
+    with patch.object(service.artifact_store, 'link') as mock_link, \
+         patch.object(service, 'register_package_version', return_value=False):
+        service.process_application_package("test", "test.cwl", "job_id", sha256="0" * 64, parsed=parsed)
+    mock_link.assert_not_called()
+
+    with patch.object(service.artifact_store, 'link') as mock_link, \
+         patch.object(service, 'register_package_version', return_value=True):
+        service.process_application_package("test", "test.cwl", "job_id", sha256="0" * 64, parsed=parsed)
+    mock_link.assert_called_once_with("0" * 64, os.path.join(str(tmp_path), "test", "sardem-sarsen", "1.0.0", "test.cwl"))
+
+def test_save_uploaded_archive(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_PATH", str(tmp_path))
+    service.artifact_store = ArtifactStore(str(tmp_path / ".blobs"))
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as archive:
+        archive.add("tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl", arcname="pkgs/a.cwl")
+        archive.add("tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl", arcname="pkgs/b.cwl")
+        archive.add("conftest.py", arcname="pkgs/conftest.py")
+    buf.seek(0)
+
+    stored = service.save_uploaded_archive("test", UploadFile(file=buf, filename="pkgs.tgz"))
+
+    assert [filename for _, filename, _, _ in stored] == ["a.cwl", "b.cwl"]
+    # identical members share one blob
+    assert stored[0][3] == stored[1][3]
+    assert os.path.samefile(stored[0][2], stored[1][2])
+
+def test_save_uploaded_archive_too_many_files(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 1)
+    service.artifact_store = ArtifactStore(str(tmp_path / ".blobs"))
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        archive.writestr("a.cwl", "cwlVersion: v1.2")
+        archive.writestr("b.cwl", "cwlVersion: v1.2")
+    buf.seek(0)
+
+    with pytest.raises(ValueError, match="maximum is 1"):
+        service.save_uploaded_archive("test", UploadFile(file=buf, filename="pkgs.zip"))
+
+def test_create_jobs_single_commit(service, mock_db):
+    jobs = service.create_jobs([
+        dict(jobId="a", namespace="test", filename="a.cwl", batch_id="batch"),
+        dict(jobId="b", namespace="test", filename="b.cwl", batch_id="batch"),
+    ])
+
+    assert [job.batch_id for job in jobs] == ["batch", "batch"]
+    mock_db.add_all.assert_called_once_with(jobs)
+    mock_db.commit.assert_called_once()
+
+def test_batch_status_aggregates_jobs():
+    def job(job_id, status):
+        return Job(id=job_id, status=status, namespace="test", filename=f"{job_id}.cwl",
+                   artifact_name="a", artifact_version="1", created_at=datetime.now(), batch_id="batch")
+
+    pending = CatalogBatchStatus.from_db_jobs("batch", [job("a", JobStatus.PENDING), job("b", JobStatus.PENDING)])
+    running = CatalogBatchStatus.from_db_jobs("batch", [job("a", JobStatus.COMPLETED), job("b", JobStatus.PENDING)])
+    failed = CatalogBatchStatus.from_db_jobs("batch", [job("a", JobStatus.COMPLETED), job("b", JobStatus.FAILED)])
+
+    assert pending.status == "pending"
+    assert running.status == "processing"
+    assert failed.status == "failed"
+    assert failed.counts == {"pending": 0, "processing": 0, "completed": 1, "failed": 1}
@@ -0,0 +1,59 @@
+import hashlib
+import os
+
+import pytest
+
+from app.services.artifact_store import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "blobs"))
+
+def _stage(store, content):
+    staging = store.staging_path()
+    with open(staging, "wb") as f:
+        f.write(content)
+    return staging, hashlib.sha256(content).hexdigest()
+
+def test_commit_shards_by_digest(store):
+    staging, digest = _stage(store, b"cwl")
+    blob = store.commit(staging, digest)
+
+    assert blob == os.path.join(store.root, digest[:2], digest[2:4], digest)
+    assert store.exists(digest)
+    assert not os.path.exists(staging)
+
+def test_commit_duplicate_discards_staging(store):
+    staging, digest = _stage(store, b"cwl")
+    blob = store.commit(staging, digest)
+    staging, _ = _stage(store, b"cwl")
+
+    assert store.commit(staging, digest) == blob
+    assert not os.path.exists(staging)
+    assert os.listdir(os.path.join(store.root, "tmp")) == []
+
+def test_link_shares_blob(store, tmp_path):
+    staging, digest = _stage(store, b"cwl")
+    blob = store.commit(staging, digest)
+
+    first = store.link(digest, str(tmp_path / "ns" / "job1" / "a.cwl"))
+    second = store.link(digest, str(tmp_path / "ns" / "app" / "develop" / "a.cwl"))
+
+    assert os.path.samefile(first, blob)
+    assert os.path.samefile(second, blob)
+    # relinking the same content is a no-op
+    assert store.link(digest, second) == second
+
+def test_ingest_existing_file(store, tmp_path):
+    staging, digest = _stage(store, b"cwl")
+    blob = store.commit(staging, digest)
+    legacy = tmp_path / "legacy.cwl"
+    legacy.write_bytes(b"cwl")
+
+    assert store.ingest(str(legacy)) == digest
+    assert os.path.samefile(str(legacy), blob)
+
+def test_link_missing_blob(store, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        store.link("0" * 64, str(tmp_path / "a.cwl"))
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, get_async_database_url
+from app.models.application_package_db import ApplicationPackage, ApplicationPackageVersion
+from app.models.job import Job, JobArchive, JobStatus
+from app.services.async_application_package_service import AsyncApplicationPackageService
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "catalog.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Job(id="job-1", status=JobStatus.COMPLETED, namespace="test", filename="test.cwl", batch_id="batch-1"))
+    db.add(JobArchive(id="job-0", status=JobStatus.COMPLETED, namespace="test", filename="test.cwl",
+                      batch_id="batch-1", created_at=datetime(2020, 1, 1)))
+    db.add(ApplicationPackage(id="pkg-1", namespace="test", artifact_name="app", job_id="job-1"))
+    db.add(ApplicationPackageVersion(id="ver-1", artifact_version="1.0.0", cwl_id="app",
+                                     cwl_url="/storage/test/app/1.0.0/test.cwl", application_package_id="pkg-1"))
+    db.commit()
+    db.close()
+    engine.dispose()
+    return path
+
+def _run(db_path, query):
+    async def _query():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                return await query(AsyncApplicationPackageService(db))
+        finally:
+            await engine.dispose()
+    return asyncio.run(_query())
+
+def test_get_package_and_version(db_path):
+    async def query(service):
+        package = await service.get_package("test", "app")
+        return package, await service.get_application_package_version(package, "1.0.0")
+
+    package, version = _run(db_path, query)
+
+    assert package.id == "pkg-1"
+    assert version.id == "ver-1"
+
+def test_get_cwl_file_path(db_path):
+    async def query(service):
+        return (await service.get_cwl_file_path("test", "app", "1.0.0"),
+                await service.get_cwl_file_path("test", "app", "2.0.0"))
+
+    assert _run(db_path, query) == ("/storage/test/app/1.0.0/test.cwl", None)
+
+def test_get_job_and_batch(db_path):
+    async def query(service):
+        return await service.get_job("job-1"), await service.get_batch_jobs("batch-1")
+
+    job, batch = _run(db_path, query)
+
+    assert job.status == JobStatus.COMPLETED
+    assert [j.id for j in batch] == ["job-0", "job-1"]
+
+def test_get_archived_job(db_path):
+    async def query(service):
+        return await service.get_job("job-0"), await service.get_job("missing")
+
+    job, missing = _run(db_path, query)
+
+    assert isinstance(job, JobArchive)
+    assert missing is None
+
+def test_get_jobs(db_path):
+    async def query(service):
+        return (await service.get_jobs(["job-0", "job-1", "missing"]),
+                await service.get_jobs(namespace="test", created_after=datetime(2021, 1, 1)),
+                await service.get_jobs(namespace="other"),
+                await service.get_jobs(["job-0", "job-1"], changed_since=datetime(2021, 1, 1)))
+
+    by_id, window, other, changed = _run(db_path, query)
+
+    assert [j.id for j in by_id] == ["job-0", "job-1"]
+    assert [j.id for j in window] == ["job-1"]
+    assert other == []
+    assert [j.id for j in changed] == ["job-1"]
+
+def test_database_now(db_path):
+    async def query(service):
+        return await service.database_now()
+
+    now = _run(db_path, query)
+
+    assert now.tzinfo is not None
+    assert abs((datetime.now(timezone.utc) - now).total_seconds()) < 5
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://user:pass@db:5432/catalog", "postgresql+asyncpg://user:pass@db:5432/catalog"),
+    ("postgresql+psycopg2://user:pass@db/catalog", "postgresql+asyncpg://user:pass@db/catalog"),
+    ("sqlite:///catalog.db", "sqlite+aiosqlite:///catalog.db"),
+])
+def test_async_database_url(url, expected):
+    assert get_async_database_url(url) == expected
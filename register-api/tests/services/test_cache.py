@@ -0,0 +1,59 @@
+import threading
+import time
+
+from app.core.cache import LRUCache, TTLCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+def test_lru_cache_invalidate_and_disabled():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.invalidate("a")
+    assert cache.get("a", "missing") == "missing"
+
+    disabled = LRUCache(0)
+    disabled.put("a", 1)
+    assert len(disabled) == 0
+
+def test_ttl_cache_expires_entries_and_misses_sooner():
+    now = [0.0]
+    cache = TTLCache(10, ttl=60, negative_ttl=5, clock=lambda: now[0])
+    cache.put("found", 1)
+    cache.put("missing", None)
+    assert cache.get("found") == 1
+
+    now[0] = 10
+    assert cache.get_or_load("missing", lambda: 2) == 2
+    assert cache.get("found") == 1
+
+    now[0] = 61
+    assert cache.get("found", "expired") == "expired"
+
+def test_ttl_cache_collapses_concurrent_loads():
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    cache = TTLCache(10, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("key", load))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
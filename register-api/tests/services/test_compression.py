@@ -0,0 +1,78 @@
+import asyncio
+import gzip
+
+import pytest
+
+from app.core import compression
+from app.core.compression import JSONCompressionMiddleware, negotiate
+from app.services.artifact_store import ArtifactStore
+
+
+@pytest.mark.parametrize("header, available, expected", [
+    (None, ["gzip"], None),
+    ("gzip, deflate", ["gzip"], "gzip"),
+    ("gzip;q=0", ["gzip"], None),
+    ("*", ["gzip"], "gzip"),
+    ("br", ["gzip"], None),
+    ("gzip", [], None),
+])
+def test_negotiate(header, available, expected):
+    assert negotiate(header, available) == expected
+
+def test_negotiate_prefers_zstd(monkeypatch):
+    monkeypatch.setattr(compression, "ENCODERS", {"zstd": None, "gzip": None})
+
+    assert negotiate("gzip, zstd") == "zstd"
+    assert negotiate("gzip, zstd;q=0.5") == "gzip"
+
+def test_write_variants(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    staging = store.staging_path()
+    with open(staging, "wb") as f:
+        f.write(b"cwlVersion: v1.2\n" * 100)
+    store.commit(staging, "ab" * 32)
+
+    store.write_variants("ab" * 32)
+
+    assert store.available_encodings("ab" * 32) == list(compression.ENCODERS)
+    with open(store.variant_path("ab" * 32, "gzip"), "rb") as f:
+        assert gzip.decompress(f.read()) == b"cwlVersion: v1.2\n" * 100
+
+def _call(app, accept_encoding):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(JSONCompressionMiddleware(app, minimum_size=100)(scope, receive, send))
+    return dict(messages[0]["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+def _response(content_type, body):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+def test_middleware_compresses_large_json():
+    body = b'{"packages": []}' * 20
+
+    headers, payload = _call(_response(b"application/json", body), b"gzip")
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"content-length"] == str(len(payload)).encode()
+    assert gzip.decompress(payload) == body
+
+@pytest.mark.parametrize("content_type, body", [
+    (b"application/json", b'{"ok": true}'),
+    (b"text/event-stream", b"data: x\n\n" * 50),
+])
+def test_middleware_skips_small_and_non_json(content_type, body):
+    headers, payload = _call(_response(content_type, body), b"gzip")
+
+    assert b"content-encoding" not in headers
+    assert payload == body
@@ -0,0 +1,89 @@
+import pytest
+
+from app.services.base_application_package_service import BaseApplicationPackageService
+from app.services.cwl_sniffer import CWLSniffError, sniff_cwl
+
+
+def _write(tmp_path, content):
+    path = tmp_path / "test.cwl"
+    path.write_text(content)
+    return str(path)
+
+@pytest.mark.parametrize("file_path", [
+    "tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl",
+    "tests/data/process_sardem-sarsen_mlucas_nasa-ogc.2.0.0.cwl",
+])
+def test_sniff_matches_full_parse(file_path):
+    service = BaseApplicationPackageService(db=None)
+    parsed = service.load_package(file_path)
+    service.quick_parse(None, None, None, parsed)
+
+    sniffed = sniff_cwl(file_path)
+
+    assert sniffed.artifact_name == parsed.artifact_name
+    assert sniffed.artifact_version == parsed.artifact_version
+    assert sniffed.docker_image == parsed.docker_image
+
+def test_sniff_requirements_list(tmp_path):
+    file_path = _write(tmp_path, """
+cwlVersion: v1.2
+s:softwareVersion: 1.0.0
+$graph:
+  - class: Workflow
+    id: "#my-workflow"
+    steps: {}
+  - class: CommandLineTool
+    id: tool
+    hints:
+      - class: DockerRequirement
+        dockerPull: hint/image
+    requirements:
+      - class: ResourceRequirement
+        coresMin: 1
+      - class: DockerRequirement
+        dockerPull: required/image
+""")
+    sniffed = sniff_cwl(file_path)
+
+    assert sniffed.artifact_name == "my-workflow"
+    assert sniffed.artifact_version == "1.0.0"
+    assert sniffed.docker_image == "required/image"
+
+def test_sniff_missing_version():
+    with pytest.raises(CWLSniffError, match="softwareVersion"):
+        sniff_cwl("tests/data/invalid.cwl")
+
+def test_sniff_missing_tool(tmp_path):
+    file_path = _write(tmp_path, """
+cwlVersion: v1.2
+s:softwareVersion: 1.0.0
+class: Workflow
+id: workflow
+""")
+    with pytest.raises(CWLSniffError, match="missing workflow or tool"):
+        sniff_cwl(file_path)
+
+def test_sniff_malformed_yaml(tmp_path):
+    file_path = _write(tmp_path, "cwlVersion: [v1.2\n")
+    with pytest.raises(CWLSniffError, match="Malformed YAML"):
+        sniff_cwl(file_path)
+
+def test_sniff_not_a_mapping(tmp_path):
+    file_path = _write(tmp_path, "- cwlVersion\n")
+    with pytest.raises(CWLSniffError, match="mapping"):
+        sniff_cwl(file_path)
+
+@pytest.mark.parametrize("version", ["1.10", "'1.10'", "2"])
+def test_sniff_version_and_hints_match_full_parse(tmp_path, version):
+    with open("tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl") as f:
+        content = f.read().replace("s:softwareVersion: 1.0.0", f"s:softwareVersion: {version}") \
+            .replace("  requirements:\n    DockerRequirement", "  hints:\n    DockerRequirement")
+    file_path = _write(tmp_path, content)
+    service = BaseApplicationPackageService(db=None)
+    parsed = service.load_package(file_path)
+    service.quick_parse(None, None, None, parsed)
+
+    sniffed = sniff_cwl(file_path)
+
+    assert sniffed.artifact_version == parsed.artifact_version == {"1.10": "1.1", "'1.10'": "1.10", "2": "2"}[version]
+    assert sniffed.docker_image is parsed.docker_image is None
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from app.core.http_cache import etag_matches, file_etag, if_range_matches, parse_range, read_range
+
+
+def test_file_etag(tmp_path):
+    path = tmp_path / "test.cwl"
+    path.write_bytes(b"cwl")
+    stat = os.stat(path)
+
+    assert file_etag("ab" * 32, stat) == f'"{"ab" * 32}"'
+    assert file_etag(None, stat).startswith('W/"')
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", "abc"', True),
+    ("*", True),
+    ('"xyz"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+def test_if_range_matches():
+    assert if_range_matches(None, '"abc"')
+    assert if_range_matches('"abc"', '"abc"')
+    assert not if_range_matches('"xyz"', '"abc"')
+    assert not if_range_matches('W/"abc"', 'W/"abc"')
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=50-500", (50, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=0-1,5-6", None),
+    ("bytes=9-0", None),
+    ("bytes=abc", None),
+    ("items=0-9", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+def test_read_range(tmp_path):
+    path = tmp_path / "test.cwl"
+    path.write_bytes(bytes(range(100)))
+
+    assert b"".join(read_range(str(path), 10, 19)) == bytes(range(10, 20))
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.models.application_package import ApplicationPackageDetails
+from app.models.application_package_version import ApplicationPackageVersion
+from app.services import invenio_application_package_service
+from app.services.invenio_application_package_service import ApplicationPackageService
+
+
+def package():
+    now = datetime.now(timezone.utc)
+    return ApplicationPackageDetails(namespace="test", artifactName="app", dateCreated=now, dateUpdated=now, id="rec-1")
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "RDM_URL", "https://rdm")
+    invenio_application_package_service.rdm_lookups.clear()
+    service = ApplicationPackageService(None, "user-token")
+    service.rdm_service = MagicMock()
+    service.rdm_service.get_package.side_effect = lambda **kwargs: package()
+    service.rdm_service.get_package_version.side_effect = \
+        lambda namespace, name, version: ApplicationPackageVersion(artifact_version=version, published=version != "draft")
+    yield service
+    invenio_application_package_service.rdm_lookups.clear()
+
+def test_lookups_are_cached_and_copied(service):
+    details = service.get_package_details("test", "app", "1.0.0")
+    assert [version.artifact_version for version in details.versions] == ["1.0.0"]
+
+    # The version appended above must not leak into the cached package
+    details = service.get_package_details("test", "app", "1.0.0")
+    assert [version.artifact_version for version in details.versions] == ["1.0.0"]
+    assert service.rdm_service.get_package.call_count == 1
+    assert service.rdm_service.get_package_version.call_count == 1
+
+def test_published_versions_outlive_drafts(service, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(invenio_application_package_service.rdm_lookups, "clock", lambda: now[0])
+    for version in ("1.0.0", "draft", "develop"):
+        service.get_application_package_version(package(), version)
+
+    now[0] = settings.RDM_LOOKUP_TTL_SECONDS + 1
+    for version in ("1.0.0", "draft", "develop"):
+        service.get_application_package_version(package(), version)
+
+    fetched = [call.args[2] for call in service.rdm_service.get_package_version.call_args_list]
+    assert fetched == ["1.0.0", "draft", "develop", "draft", "develop"]
+
+def test_adding_a_version_invalidates_the_package(service):
+    service.get_package("test", "app")
+    service.update_or_create_version(package(), "draft", "cwl-id", "/tmp/app.cwl", None)
+    service.rdm_service.add_package_version.assert_called_once()
+
+    service.get_package("test", "app")
+    assert service.rdm_service.get_package.call_count == 2
+
+def test_published_version_is_not_registered_again(service):
+    service.get_application_package_version(package(), "1.0.0")
+    with pytest.raises(ValueError):
+        service.update_or_create_version(package(), "1.0.0", "cwl-id", "/tmp/app.cwl", None)
+    assert service.rdm_service.get_package_version.call_count == 1
+
+def test_async_lookups_share_the_cache(service):
+    service.async_rdm_service = MagicMock()
+    service.async_rdm_service.get_package = AsyncMock(side_effect=lambda namespace, name: package())
+
+    async def lookups():
+        return await asyncio.gather(*(service.get_package_async("test", "app") for _ in range(3)))
+
+    assert [p.id for p in asyncio.run(lookups())] == ["rec-1"] * 3
+    assert service.async_rdm_service.get_package.await_count == 1
+    assert service.get_package("test", "app").id == "rec-1"
+    service.rdm_service.get_package.assert_not_called()
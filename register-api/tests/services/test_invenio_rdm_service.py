@@ -0,0 +1,157 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+import httpx
+import requests
+
+from app.core.config import settings
+from app.services import invenio_rdm_service
+from app.services.invenio_rdm_service import AsyncIvenioRDMService, IvenioRDMService
+
+
+def rdm_record(version, title="app"):
+    return {
+        "id": f"rec-{version}",
+        "metadata": {"title": title, "version": version, "description": None},
+        "links": {"files": f"https://rdm/api/records/rec-{version}/files"},
+        "files": {"entries": {"app.cwl": {}}},
+        "is_published": True,
+    }
+
+def _response(status_code=200, json=None):
+    response = MagicMock(spec=requests.Response)
+    response.status_code = status_code
+    response.json.return_value = json
+    return response
+
+@pytest.fixture(autouse=True)
+def clear_community_ids():
+    invenio_rdm_service.community_ids.clear()
+    yield
+    invenio_rdm_service.community_ids.clear()
+
+@pytest.fixture
+def session(monkeypatch):
+    session = MagicMock(spec=requests.Session)
+    monkeypatch.setattr(invenio_rdm_service, "_session", session)
+    return session
+
+def test_get_session_is_shared_and_pooled(monkeypatch):
+    monkeypatch.setattr(invenio_rdm_service, "_session", None)
+    session = invenio_rdm_service.get_session()
+
+    assert invenio_rdm_service.get_session() is session
+    assert session.get_adapter("https://rdm.example.org")._pool_maxsize == settings.RDM_POOL_SIZE
+    invenio_rdm_service.close_session()
+    assert invenio_rdm_service._session is None
+
+def test_requests_use_shared_session_with_timeouts(session):
+    session.request.return_value = _response(json={"id": "community-1"})
+
+    assert IvenioRDMService("https://rdm", "user-token").get_community_id("test") == "community-1"
+    assert IvenioRDMService("https://rdm", "other-token").get_community_id("other") == "community-1"
+
+    (first, second) = session.request.call_args_list
+    assert first.args == ("GET", "https://rdm/api/communities/test")
+    assert first.kwargs["timeout"] == (settings.RDM_CONNECT_TIMEOUT, settings.RDM_READ_TIMEOUT)
+    assert first.kwargs["headers"]["Authorization"] == "Bearer user-token"
+    assert second.kwargs["headers"]["Authorization"] == "Bearer other-token"
+
+def test_async_client_lookups(monkeypatch):
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        if request.url.path == "/api/communities/test":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"hits": {"hits": [rdm_record("1.0.0"), rdm_record("2.0.0")]}})
+
+    async def lookups():
+        monkeypatch.setattr(invenio_rdm_service, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        service = AsyncIvenioRDMService("https://rdm", "user-token")
+        try:
+            return (await service.get_package_version("test", "app", "2.0.0"),
+                    await service.get_community_id("test"))
+        finally:
+            await invenio_rdm_service.close_async_client()
+
+    version, community_id = asyncio.run(lookups())
+
+    assert version.artifact_version == "2.0.0"
+    assert version.cwl_url == "https://rdm/api/records/rec-2.0.0/files/app.cwl/content"
+    assert community_id is None
+    assert requests_seen[0].headers["Authorization"] == "Bearer user-token"
+
+def test_community_ids_are_cached_including_unknown_ones(session):
+    session.request.side_effect = [_response(json={"id": "community-1"}), _response(status_code=404),
+                                   _response(json={"id": "community-2"})]
+    service = IvenioRDMService("https://rdm", "user-token")
+
+    assert [service.get_community_id("test") for _ in range(3)] == ["community-1"] * 3
+    assert [service.get_community_id("missing") for _ in range(3)] == [None] * 3
+    assert session.request.call_count == 2
+
+    service.invalidate_community_id("test")
+    assert service.get_community_id("test") == "community-2"
+    assert session.request.call_count == 3
+
+def test_community_ids_are_cached_per_token(session):
+    session.request.side_effect = [_response(status_code=404), _response(json={"id": "community-1"}),
+                                   _response(json={"id": "community-1"})]
+    anonymous, member = IvenioRDMService("https://rdm", None), IvenioRDMService("https://rdm", "member-token")
+
+    # A restricted community is unknown to one caller but not to another
+    assert anonymous.get_community_id("test") is None
+    assert member.get_community_id("test") == "community-1"
+    assert member.get_community_id("test") == "community-1"
+
+    # Invalidating drops the entries of every token
+    member.invalidate_community_id("test")
+    assert anonymous.get_community_id("test") == "community-1"
+    assert session.request.call_count == 3
+
+def test_community_id_errors_are_not_cached(session):
+    failed = _response(status_code=500)
+    failed.raise_for_status.side_effect = requests.HTTPError("500")
+    session.request.side_effect = [failed, _response(json={"id": "community-1"})]
+    service = IvenioRDMService("https://rdm", "user-token")
+
+    with pytest.raises(requests.HTTPError):
+        service.get_community_id("test")
+    assert service.get_community_id("test") == "community-1"
+
+def test_async_community_id_misses_share_one_request(monkeypatch):
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"id": "community-1"})
+
+    async def lookups():
+        monkeypatch.setattr(invenio_rdm_service, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        service = AsyncIvenioRDMService("https://rdm", "user-token")
+        try:
+            return await asyncio.gather(*(service.get_community_id("test") for _ in range(5)))
+        finally:
+            await invenio_rdm_service.close_async_client()
+
+    assert asyncio.run(lookups()) == ["community-1"] * 5
+    assert len(requests_seen) == 1
+
+def test_version_lookup_is_targeted_and_pages_lazily(session):
+    session.request.side_effect = [
+        _response(json={"hits": {"hits": [rdm_record("1.0.1")]},
+                        "links": {"next": "https://127.0.0.1:5000/api/communities/test/records?page=2"}}),
+        _response(json={"hits": {"hits": [rdm_record("1.0")]},
+                        "links": {"next": "https://127.0.0.1:5000/api/communities/test/records?page=3"}}),
+    ]
+
+    version = IvenioRDMService("https://rdm", "user-token").get_package_version("test", "app", "1.0")
+
+    assert version.artifact_version == "1.0"
+    first, second = session.request.call_args_list
+    assert first.kwargs["params"] == {"q": 'metadata.title:"app" AND metadata.version:"1.0"', "allversions": "true",
+                                      "size": settings.RDM_VERSION_PAGE_SIZE, "sort": "newest"}
+    assert second.args == ("GET", "https://rdm/api/communities/test/records?page=2")
@@ -0,0 +1,94 @@
+import asyncio
+
+from app.services import job_events
+
+
+def _run(test):
+    async def _with_broker():
+        await job_events.start()
+        try:
+            return await test()
+        finally:
+            await job_events.shutdown()
+    return asyncio.run(_with_broker())
+
+def test_publish_from_worker_thread_wakes_subscriber():
+    async def test():
+        with job_events.subscribe("job-1") as changed, job_events.subscribe("job-2") as other:
+            await asyncio.to_thread(job_events.publish, "job-1")
+            await asyncio.wait_for(changed.wait(), 1)
+            return other.is_set()
+
+    assert _run(test) is False
+    assert "job-1" not in job_events._subscribers
+
+def test_publish_on_loop_wakes_subscriber():
+    async def test():
+        with job_events.subscribe("job-1") as changed:
+            job_events.publish("job-1")
+            return changed.is_set()
+
+    assert _run(test) is True
+
+def test_publish_without_broker_is_noop():
+    job_events.publish("job-1")
+
+def test_long_poll_ignores_changes_clients_cannot_see(monkeypatch):
+    from datetime import datetime, timezone
+    from unittest.mock import AsyncMock
+
+    from app.api.routes import catalog_job
+    from app.models.catalog_job import CatalogJobStatus
+
+    def status(status, message, updated):
+        return CatalogJobStatus(jobId="job-1", status=status, namespace="test", artifact_name="app",
+                                artifact_version="1.0.0", filename="app.cwl", message=message,
+                                createdAt=datetime(2026, 1, 1, tzinfo=timezone.utc),
+                                updatedAt=datetime(2026, 1, 1, 0, updated, tzinfo=timezone.utc))
+
+    # Initial read, a lease heartbeat, then the job finishing
+    reads = iter([status("processing", "Processing", 0), status("processing", "Processing", 1),
+                  status("completed", "Done", 2)])
+    monkeypatch.setattr(catalog_job, "get_job_by_id", AsyncMock(side_effect=lambda db, job_id: next(reads)))
+
+    async def test():
+        async def publish():
+            for _ in range(2):
+                await asyncio.sleep(0.01)
+                job_events.publish("job-1")
+        publisher = asyncio.create_task(publish())
+        job = await catalog_job.get_job_status("job-1", wait="5s", db=AsyncMock())
+        await publisher
+        return job
+
+    assert _run(test).status == "completed"
+
+def test_waiters_reread_until_listen_reconnects(monkeypatch):
+    from unittest.mock import AsyncMock, MagicMock
+
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "JOB_EVENTS_KEEPALIVE_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "JOB_EVENTS_RECONNECT_MIN_SECONDS", 0.01)
+    attempts = []
+
+    async def listen():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("connection refused")
+        monkeypatch.setattr(job_events, "_listener", MagicMock(invalidate=AsyncMock(), close=AsyncMock()))
+
+    monkeypatch.setattr(job_events, "_listen", listen)
+    monkeypatch.setattr(job_events, "_healthy", AsyncMock(return_value=True))
+
+    async def test():
+        job_events._supervisor = asyncio.create_task(job_events._supervise())
+        with job_events.subscribe("job-1") as changed:
+            # Woken without any notification while LISTEN is down
+            await asyncio.wait_for(changed.wait(), 1)
+            while job_events._listener is None:
+                await asyncio.sleep(0.01)
+        return len(attempts)
+
+    assert _run(test) == 3
+    assert job_events._listener is None and job_events._supervisor is None
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import application_package_db  # noqa: F401
+from app.models.job import Job, JobStatus
+from app.services.job_progress import JobProgressWriter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def engine():
+    return create_engine("sqlite://")
+
+@pytest.fixture
+def db(engine):
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Job(id="job-1", status=JobStatus.PENDING, namespace="test", filename="test.cwl"))
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.fixture
+def statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+def test_transitions_are_single_updates(db, statements):
+    writer = JobProgressWriter(db, "job-1", min_interval=60)
+
+    writer.update(JobStatus.PROCESSING, "Processing", 0)
+    writer.update(JobStatus.COMPLETED, "Done", 100)
+
+    assert len(statements) == 2
+    assert all(s.startswith("UPDATE jobs") for s in statements)
+    job = db.query(Job).filter_by(id="job-1").one()
+    assert (job.status, job.message, job.progress) == (JobStatus.COMPLETED, "Done", 100)
+
+def test_progress_ticks_are_coalesced(db, statements):
+    clock = FakeClock()
+    writer = JobProgressWriter(db, "job-1", JobStatus.PROCESSING, min_interval=1.0, clock=clock)
+
+    for progress in range(10, 50, 10):
+        writer.update(JobStatus.PROCESSING, "Working", progress)
+    assert statements == []
+
+    clock.now = 1.0
+    writer.update(JobStatus.PROCESSING, "Working", 50)
+    writer.update(JobStatus.PROCESSING, "Working", 60)
+    assert len(statements) == 1
+
+    writer.flush()
+    writer.flush()
+    assert len(statements) == 2
+    assert db.query(Job).filter_by(id="job-1").one().progress == 60
+
+def test_terminal_status_is_written_immediately(db, statements):
+    writer = JobProgressWriter(db, "job-1", JobStatus.FAILED, min_interval=60)
+
+    writer.update(JobStatus.FAILED, "Failed again", 100)
+
+    assert len(statements) == 1
+    assert writer.finished
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models import application_package_db  # noqa: F401
+from app.models.job import Job, JobStatus
+from app.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+def _add_job(db, job_id, status=JobStatus.PENDING, created_at=None, **kwargs):
+    job = Job(id=job_id, status=status, namespace="test", filename="test.cwl",
+              created_at=created_at or datetime.now(timezone.utc), **kwargs)
+    db.add(job)
+    db.commit()
+    return job
+
+def test_claim_oldest_pending(db):
+    now = datetime.now(timezone.utc)
+    _add_job(db, "newer", created_at=now)
+    _add_job(db, "older", created_at=now - timedelta(minutes=1))
+
+    job = JobQueue(db, "worker-1").claim()
+
+    assert job.id == "older"
+    assert job.status == JobStatus.PROCESSING
+    assert job.worker_id == "worker-1"
+    assert job.attempts == 1
+    assert job.lease_expires_at is not None
+
+def test_claim_empty_queue(db):
+    _add_job(db, "done", status=JobStatus.COMPLETED)
+    assert JobQueue(db).claim() is None
+
+def test_claim_skips_live_lease(db):
+    _add_job(db, "running", status=JobStatus.PROCESSING, worker_id="other", attempts=1,
+             lease_expires_at=datetime.now(timezone.utc) + timedelta(minutes=5))
+    assert JobQueue(db).claim() is None
+
+def test_reclaim_expired_lease(db):
+    _add_job(db, "stale", status=JobStatus.PROCESSING, worker_id="crashed", attempts=1,
+             lease_expires_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+
+    job = JobQueue(db, "worker-2").claim()
+
+    assert job.id == "stale"
+    assert job.worker_id == "worker-2"
+    assert job.attempts == 2
+
+def test_reclaim_gives_up_after_max_attempts(db):
+    _add_job(db, "poison", status=JobStatus.PROCESSING, worker_id="crashed", attempts=settings.JOB_MAX_ATTEMPTS,
+             lease_expires_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+
+    assert JobQueue(db).claim() is None
+    job = db.query(Job).filter_by(id="poison").one()
+    assert job.status == JobStatus.FAILED
+
+def test_heartbeat_only_for_owner(db):
+    _add_job(db, "job")
+    queue = JobQueue(db, "worker-1")
+    queue.claim()
+
+    assert queue.heartbeat("job")
+    assert not JobQueue(db, "worker-2").heartbeat("job")
+
+def test_lease_is_set_by_database_clock(db):
+    _add_job(db, "job")
+    queue = JobQueue(db, "worker-1")
+
+    job = queue.claim()
+    assert job.lease_expires_at - job.heartbeat_at == timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+    # A lease that has not run out by the database clock is not reclaimed
+    assert JobQueue(db, "worker-2").claim() is None
+    assert queue.heartbeat("job")
+    db.refresh(job)
+    assert job.lease_expires_at - job.heartbeat_at == timedelta(seconds=settings.JOB_LEASE_SECONDS)
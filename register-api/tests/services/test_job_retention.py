@@ -0,0 +1,78 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.job import Job, JobArchive, JobStatus
+from app.services.job_retention import JobRetention, partition_name
+
+NOW = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for job_id, status, age in [
+        ("old-done", JobStatus.COMPLETED, 40),
+        ("old-failed", JobStatus.FAILED, 60),
+        ("old-pending", JobStatus.PENDING, 40),
+        ("new-done", JobStatus.COMPLETED, 5),
+    ]:
+        session.add(Job(id=job_id, status=status, namespace="test", filename="test.cwl",
+                        batch_id="batch-1", created_at=NOW - timedelta(days=age)))
+    session.commit()
+    yield session
+    session.close()
+
+def test_archive_moves_old_finished_jobs(db):
+    export = io.StringIO()
+
+    moved = JobRetention(db).archive(older_than_days=30, export=export, batch_size=1, now=NOW)
+
+    assert moved == 2
+    assert sorted(job.id for job in db.query(Job)) == ["new-done", "old-pending"]
+    archived = {job.id: job for job in db.query(JobArchive)}
+    assert sorted(archived) == ["old-done", "old-failed"]
+    assert archived["old-failed"].status == JobStatus.FAILED
+    assert archived["old-done"].batch_id == "batch-1"
+    lines = [json.loads(line) for line in export.getvalue().splitlines()]
+    assert [line["id"] for line in lines] == ["old-failed", "old-done"]
+    assert lines[0]["status"] == "failed"
+
+def test_partition_maintenance_skipped_without_postgres(db):
+    retention = JobRetention(db)
+
+    assert retention.ensure_partitions() == []
+    assert retention.drop_empty_partitions() == []
+    assert partition_name(NOW.date()) == "jobs_2026_10"
+
+def test_archive_keeps_jobs_when_export_fails(db):
+    class FailingExport(io.StringIO):
+        def write(self, line):
+            raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        JobRetention(db).archive(older_than_days=30, export=FailingExport(), now=NOW)
+
+    assert sorted(job.id for job in db.query(Job)) == ["new-done", "old-done", "old-failed", "old-pending"]
+    assert db.query(JobArchive).count() == 0
+
+def test_run_archives_when_partitions_cannot_be_created(db, monkeypatch):
+    def refuse(name, start, end):
+        raise OperationalError("CREATE TABLE", {}, Exception("updated partition constraint would be violated"))
+
+    monkeypatch.setattr(JobRetention, "partitioned", True)
+    retention = JobRetention(db)
+    monkeypatch.setattr(retention, "_create_partition", refuse)
+    monkeypatch.setattr(retention, "drop_empty_partitions", lambda older_than_days=None: [])
+
+    assert retention.ensure_partitions(months_ahead=1) == []
+    assert retention.run(older_than_days=30) == 2
+    assert sorted(job.id for job in db.query(Job)) == ["new-done", "old-pending"]
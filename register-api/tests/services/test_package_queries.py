@@ -0,0 +1,149 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.application_package import ApplicationPackageDetails
+from app.models.application_package_db import ApplicationPackage, ApplicationPackageVersion
+from app.services.application_package_service import ApplicationPackageService
+from app.services.package_queries import (CwlFile, cache_cwl_file, cwl_file_cache, decode_cursor, encode_cursor,
+                                          search_packages_statement)
+
+
+@pytest.fixture
+def engine():
+    return create_engine("sqlite://")
+
+@pytest.fixture
+def queries(engine):
+    """Statements run against the engine from the point the fixture is requested."""
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+@pytest.fixture
+def service(engine):
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    for i, (namespace, name, published) in enumerate([
+        ("alice", "beta", True),
+        ("alice", "alpha", False),
+        ("bob", "alpha", True),
+        ("bob", "gamma", True),
+        ("carol", "alpha", None),
+    ]):
+        db.add(ApplicationPackage(id=f"pkg-{i}", namespace=namespace, artifact_name=name))
+        if published is not None:
+            db.add(ApplicationPackageVersion(id=f"ver-{i}", artifact_version="1.0.0", cwl_id=name,
+                                             cwl_url=f"/storage/{namespace}/{name}/1.0.0/{name}.cwl",
+                                             published=published, application_package_id=f"pkg-{i}"))
+            db.add(ApplicationPackageVersion(id=f"ver-{i}-dev", artifact_version="develop", cwl_id=name,
+                                             uploader=namespace, docker_image=f"ghcr.io/{namespace}/{name}:dev",
+                                             application_package_id=f"pkg-{i}"))
+    db.commit()
+    yield ApplicationPackageService(db)
+    db.close()
+
+def _keys(packages):
+    return [(p.namespace, p.artifact_name) for p in packages]
+
+def test_list_packages_filters(service):
+    assert _keys(service.list_packages("bob", None)) == [("bob", "alpha"), ("bob", "gamma")]
+    assert _keys(service.list_packages(None, "alpha")) == [("alice", "alpha"), ("bob", "alpha"), ("carol", "alpha")]
+    assert _keys(service.list_packages(None, None, published=True)) == [("alice", "beta"), ("bob", "alpha"), ("bob", "gamma")]
+    assert _keys(service.list_packages(None, None, published=False)) == [("alice", "alpha"), ("carol", "alpha")]
+    assert service.count_packages(None, "alpha", published=True) == 1
+
+def test_list_packages_keyset_pages(service):
+    pages = []
+    cursor = None
+    while True:
+        page = service.list_packages(None, None, limit=2, cursor=cursor)
+        if not page:
+            break
+        pages.append(_keys(page))
+        cursor = encode_cursor(page[-1])
+
+    assert pages == [
+        [("alice", "alpha"), ("alice", "beta")],
+        [("bob", "alpha"), ("bob", "gamma")],
+        [("carol", "alpha")],
+    ]
+    assert _keys(service.list_packages(None, None, limit=2, offset=2)) == pages[1]
+
+def test_cursor_round_trip():
+    package = ApplicationPackage(id="pkg-1", namespace="alice", artifact_name="alpha")
+
+    assert decode_cursor(encode_cursor(package)) == ("alice", "alpha", "pkg-1")
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "WzFd"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+def test_list_packages_with_versions_query_count(service, queries):
+    packages = service.list_packages(None, None, with_versions=True)
+    details = [ApplicationPackageDetails.from_db_package_with_versions(p) for p in packages]
+
+    assert len(queries) == 2
+    assert [len(d.versions) for d in details] == [2, 2, 2, 2, 0]
+
+def test_get_package_details_query_count(service, queries):
+    details = service.get_package_details("bob", "gamma")
+
+    assert len(queries) == 2
+    assert sorted(v.artifact_version for v in details.versions) == ["1.0.0", "develop"]
+
+def test_get_package_version_details_query_count(service, queries):
+    details = service.get_package_details("bob", "gamma", "develop")
+
+    assert len(queries) == 1
+    assert [v.artifact_version for v in details.versions] == ["develop"]
+    assert service.get_package_details("bob", "gamma", "9.9.9") is None
+
+def test_search_packages(service):
+    assert _keys(service.search_packages("ALPH")) == [("alice", "alpha"), ("bob", "alpha"), ("carol", "alpha")]
+    assert _keys(service.search_packages("ghcr.io/bob")) == [("bob", "alpha"), ("bob", "gamma")]
+    assert _keys(service.search_packages("alice", published=True)) == [("alice", "beta")]
+    assert _keys(service.search_packages("a_p")) == []
+    assert service.count_search("alpha", namespace="bob") == 1
+
+def test_search_packages_postgres_ranking():
+    sql = str(search_packages_statement("sardem", "postgresql", limit=20).compile(dialect=postgresql.dialect()))
+
+    assert "application_packages.search_vector @@ websearch_to_tsquery" in sql
+    assert "application_package_versions.search_vector @@ websearch_to_tsquery" in sql
+    assert "ORDER BY ts_rank_cd(" in sql
+    assert "similarity(application_packages.artifact_name" in sql
+
+def test_get_cwl_file_path(service, queries):
+    assert service.get_cwl_file_path("bob", "gamma", "1.0.0") == "/storage/bob/gamma/1.0.0/gamma.cwl"
+    assert service.get_cwl_file_path("bob", "gamma", "latest") == "/storage/bob/gamma/1.0.0/gamma.cwl"
+    assert service.get_cwl_file_path("alice", "alpha", "latest") is None
+    assert service.get_cwl_file_path("bob", "gamma", "9.9.9") is None
+    assert len(queries) == 4
+
+def test_cache_cwl_file_keeps_published_versions_only():
+    cwl_file_cache.clear()
+    published = CwlFile("/storage/a.cwl", "0" * 64, True)
+
+    cache_cwl_file("bob", "gamma", "1.0.0", published)
+    cache_cwl_file("bob", "gamma", "latest", published)
+    cache_cwl_file("bob", "gamma", "develop", CwlFile("/storage/b.cwl", None, False))
+
+    assert cwl_file_cache.get(("bob", "gamma", "1.0.0")) == published
+    assert len(cwl_file_cache) == 1
+    cwl_file_cache.clear()
+
+def test_cached_cwl_files_expire(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cwl_file_cache, "clock", lambda: now[0])
+    cwl_file_cache.clear()
+    cache_cwl_file("bob", "gamma", "1.0.0", CwlFile("/storage/a.cwl", "0" * 64, True))
+
+    now[0] = settings.CWL_FILE_CACHE_TTL_SECONDS + 1
+
+    assert cwl_file_cache.get(("bob", "gamma", "1.0.0")) is None
+    cwl_file_cache.clear()
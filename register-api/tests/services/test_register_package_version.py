@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.application_package_db import ApplicationPackage, ApplicationPackageVersion
+from app.models.job import Job, JobStatus
+from app.services.application_package_service import ApplicationPackageService
+
+
+@pytest.fixture
+def engine():
+    return create_engine("sqlite://")
+
+@pytest.fixture
+def db(engine):
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for job_id in ("job-1", "job-2"):
+        session.add(Job(id=job_id, status=JobStatus.PROCESSING, namespace="test", filename="test.cwl"))
+    session.commit()
+    yield session
+    session.close()
+
+def _register(service, job_id, version="1.0.0", cwl_url="/storage/test/app/1.0.0/test.cwl"):
+    return service.register_package_version("test", "app", version, job_id, cwl_url, "test/image", sha256=job_id * 8)
+
+def test_register_creates_package_version_and_completes_job(db, engine):
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(conn))
+
+    _register(ApplicationPackageService(db), "job-1")
+
+    assert len(commits) == 1
+    package = db.query(ApplicationPackage).one()
+    assert (package.namespace, package.artifact_name, package.job_id) == ("test", "app", "job-1")
+    version = db.query(ApplicationPackageVersion).one()
+    assert (version.application_package_id, version.artifact_version) == (package.id, "1.0.0")
+    assert version.sha256 == "job-1" * 8
+    job = db.query(Job).filter_by(id="job-1").one()
+    assert (job.status, job.progress) == (JobStatus.COMPLETED, 100)
+
+def test_register_upserts_existing_package_and_version(db):
+    service = ApplicationPackageService(db)
+    _register(service, "job-1")
+    _register(service, "job-2", cwl_url="/storage/test/app/1.0.0/new.cwl")
+    _register(service, "job-2", version="2.0.0")
+
+    package = db.query(ApplicationPackage).one()
+    assert package.job_id == "job-2"
+    versions = {v.artifact_version: v for v in db.query(ApplicationPackageVersion)}
+    assert sorted(versions) == ["1.0.0", "2.0.0"]
+    assert versions["1.0.0"].cwl_url == "/storage/test/app/1.0.0/new.cwl"
+    assert versions["1.0.0"].sha256 == "job-2" * 8
+
+def test_register_published_version_fails_job(db):
+    service = ApplicationPackageService(db)
+    assert _register(service, "job-1")
+    db.query(ApplicationPackageVersion).one().published = True
+    db.commit()
+
+    assert not _register(service, "job-2", cwl_url="/storage/test/app/1.0.0/new.cwl")
+
+    version = db.query(ApplicationPackageVersion).one()
+    assert version.cwl_url == "/storage/test/app/1.0.0/test.cwl"
+    assert db.query(ApplicationPackage).one().job_id == "job-1"
+    job = db.query(Job).filter_by(id="job-2").one()
+    assert job.status == JobStatus.FAILED
+    assert "already exists" in job.message
@@ -0,0 +1,41 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.request_limits import UPLOAD_FORM_OVERHEAD, BodySizeLimitMiddleware, request_size_limit
+
+
+def _client(max_size):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_size=max_size)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+def test_small_body_passes():
+    response = _client(1024).post("/upload", files={"file": ("a.cwl", b"x" * 100)})
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+def test_rejected_from_content_length():
+    response = _client(1024).post("/upload", files={"file": ("a.cwl", b"x" * 2048)})
+
+    assert response.status_code == 413
+
+def test_rejected_while_reading_chunked_body():
+    def chunks():
+        for _ in range(4):
+            yield b"x" * 1024
+
+    response = _client(1024).post("/upload", content=chunks(),
+                                  headers={"Content-Type": "multipart/form-data; boundary=b"})
+
+    assert response.status_code == 413
+
+def test_limit_by_path():
+    assert request_size_limit("/test/ogc-application-package") == settings.MAX_UPLOAD_SIZE + UPLOAD_FORM_OVERHEAD
+    assert request_size_limit("/test/ogc-application-package/batch") == settings.MAX_REQUEST_SIZE
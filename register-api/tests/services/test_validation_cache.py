@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.validation_result import ValidationResult
+from app.services import validation_cache
+from app.services.validation_cache import ValidationCache
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture(autouse=True)
+def evict_every_put(monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_CACHE_EVICT_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "VALIDATION_CACHE_TOUCH_SECONDS", 0)
+
+def count(db):
+    with db() as session:
+        return session.query(ValidationResult).count()
+
+def test_miss_then_hit(db):
+    cache = ValidationCache(db, "0.5.0")
+    before = validation_cache.stats()
+
+    assert cache.get("abc") is None
+    cache.put("abc", False, [{"type": "error", "message": "bad", "req": None}])
+    assert cache.get("abc") == (False, [{"type": "error", "message": "bad", "req": None}])
+
+    after = validation_cache.stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+def test_keyed_by_validator_version(db):
+    ValidationCache(db, "0.5.0").put("abc", True, [])
+    assert ValidationCache(db, "0.6.0").get("abc") is None
+
+def test_evicts_least_recently_used(db, monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_CACHE_MAX_ENTRIES", 2)
+    cache = ValidationCache(db, "0.5.0")
+    cache.put("a", True, [])
+    cache.put("b", True, [])
+    cache.get("a")
+    cache.put("c", True, [])
+
+    assert count(db) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+def test_disabled(db, monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_CACHE_MAX_ENTRIES", 0)
+    cache = ValidationCache(db, "0.5.0")
+    cache.put("abc", True, [])
+    assert cache.get("abc") is None
+    assert count(db) == 0
+
+def test_eviction_and_touches_are_throttled(db, monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_CACHE_MAX_ENTRIES", 1)
+    monkeypatch.setattr(settings, "VALIDATION_CACHE_EVICT_INTERVAL_SECONDS", 3600)
+    monkeypatch.setattr(settings, "VALIDATION_CACHE_TOUCH_SECONDS", 3600)
+    monkeypatch.setattr(validation_cache, "_evicted_at", 0.0)
+    cache = ValidationCache(db, "0.5.0")
+    cache.put("a", True, [])
+    with db() as session:
+        last_used_at = session.get(ValidationResult, ("a", "0.5.0")).last_used_at
+
+    cache.put("b", True, [])
+    cache.put("c", True, [])
+    assert cache.get("a") == (True, [])
+
+    assert count(db) == 3
+    with db() as session:
+        assert session.get(ValidationResult, ("a", "0.5.0")).last_used_at == last_used_at
+
+def test_concurrent_puts_of_the_same_content(db, monkeypatch):
+    cache = ValidationCache(db, "0.5.0")
+    cache.put("abc", True, [])
+    # The other upload's row appears between merge's lookup and the insert
+    monkeypatch.setattr(Session, "get", lambda *args, **kwargs: None)
+
+    cache.put("abc", True, [])
+
+    assert count(db) == 1
+
+def test_load_failures_are_cached_but_pool_crashes_are_not(tmp_path, monkeypatch):
+    import asyncio
+    from concurrent.futures.process import BrokenProcessPool
+    from unittest.mock import AsyncMock
+
+    from app.api.routes.application_package import validate_stored_package
+    from app.services import validation_pool
+
+    # A file database, as the cache is used from threadpool threads
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    cache = ValidationCache(sessionmaker(bind=engine), "0.5.0")
+    cwl = "tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl"
+    monkeypatch.setattr(validation_pool, "validate_and_parse",
+                        AsyncMock(side_effect=validation_pool.PackageLoadError("not a CWL document")))
+    assert asyncio.run(validate_stored_package(cache, cwl, "abc")) == (False, ["not a CWL document"], None)
+    assert cache.get("abc") == (False, ["not a CWL document"])
+
+    monkeypatch.setattr(validation_pool, "validate_and_parse", AsyncMock(side_effect=BrokenProcessPool()))
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(validate_stored_package(cache, cwl, "def"))
+    assert cache.get("def") is None
@@ -0,0 +1,60 @@
+import asyncio
+import pickle
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services import validation_pool
+
+VALID_CWL = "tests/data/process_sardem-sarsen_mlucas_nasa-ogc.cwl"
+INVALID_CWL = "tests/data/invalid.cwl"
+
+
+def test_load_and_validate_strips_cwl_objects():
+    is_valid, issues, parsed = validation_pool._load_and_validate(VALID_CWL)
+
+    assert is_valid
+    assert parsed.artifact_name == "sardem-sarsen"
+    assert parsed.artifact_version == "1.0.0"
+    assert parsed.docker_image == "ghcr.io/maap-project/sardem-sarsen:mlucas_nasa-ogc"
+    assert parsed.workflow is None and parsed.app_package is None
+    # Must be able to cross the process boundary
+    assert pickle.loads(pickle.dumps(parsed)) == parsed
+
+def test_load_and_validate_invalid():
+    issue = {"type": "error", "message": "bad", "req": "req-8"}
+    with patch("app.services.base_application_package_service.BaseApplicationPackageService.validate_package",
+               return_value=(False, [issue])):
+        is_valid, issues, parsed = validation_pool._load_and_validate(VALID_CWL)
+
+    assert not is_valid
+    assert issues == [issue]
+    assert parsed is None
+
+def test_load_and_validate_unloadable():
+    with pytest.raises(validation_pool.PackageLoadError):
+        validation_pool._load_and_validate(INVALID_CWL)
+
+def test_load_and_validate_tool_without_requirements(tmp_path):
+    with open(VALID_CWL) as f:
+        content = f.read().replace("  requirements:\n    DockerRequirement", "  hints:\n    DockerRequirement")
+    file_path = tmp_path / "hints.cwl"
+    file_path.write_text(content)
+
+    # The validator itself wants requirements; quick parse must still not fail on their absence
+    with patch("app.services.base_application_package_service.BaseApplicationPackageService.validate_package",
+               return_value=(True, [])):
+        is_valid, issues, parsed = validation_pool._load_and_validate(str(file_path))
+
+    assert is_valid
+    assert parsed.artifact_name == "sardem-sarsen"
+    assert parsed.docker_image is None
+
+def test_validate_and_parse_inline(monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_POOL_SIZE", 0)
+    is_valid, issues, parsed = asyncio.run(validation_pool.validate_and_parse(VALID_CWL))
+
+    assert is_valid
+    assert parsed.artifact_name == "sardem-sarsen"
+    assert parsed.workflow is not None
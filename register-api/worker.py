@@ -0,0 +1,96 @@
+"""
+Standalone ingest worker.
+
+Claims queued registrations from the jobs table and processes them outside
+the API process. Run as many replicas as needed with USE_JOB_QUEUE enabled
+on the API:
+
+    python worker.py [--once]
+"""
+import argparse
+import logging
+import os
+import signal
+import threading
+
+from fastapi.logger import logger
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.parsed_application_package import ParsedApplicationPackage
+from app.services import service_factory
+from app.services.job_queue import Heartbeat, JobQueue, default_worker_id
+
+# Register the remaining models so the Job relationships resolve
+from app.models import application_package_db  # noqa: F401
+
+
+def process_job(job, worker_id: str) -> None:
+    """Run the ingest pipeline for a claimed job in its own session."""
+    db = SessionLocal()
+    try:
+        service = service_factory.get_application_pacakge_service(db, settings.RDM_SERVICE_TOKEN)
+        file_path = os.path.join(settings.STORAGE_PATH, job.namespace, job.id, job.filename)
+        parsed = None
+        if job.artifact_name and job.artifact_version:
+            # Fields extracted at upload time, so the worker does not parse the CWL again
+            parsed = ParsedApplicationPackage(
+                file_path=file_path,
+                artifact_name=job.artifact_name,
+                artifact_version=job.artifact_version,
+                docker_image=job.docker_image
+            )
+        with Heartbeat(SessionLocal, job.id, worker_id):
+            service.process_application_package(
+                namespace=job.namespace,
+                filename=job.filename,
+                job_id=job.id,
+                sha256=job.sha256,
+                parsed=parsed
+            )
+    finally:
+        db.close()
+
+
+def run(once: bool = False) -> None:
+    worker_id = default_worker_id()
+    stopping = threading.Event()
+
+    def _stop(signum, frame):
+        logger.info(f"Worker {worker_id} stopping after current job")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    logger.info(f"Ingest worker {worker_id} started")
+    while not stopping.is_set():
+        db = SessionLocal()
+        try:
+            queue = JobQueue(db, worker_id)
+            job = queue.claim()
+            if job is None:
+                if once:
+                    return
+                stopping.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+                continue
+
+            logger.info(f"Worker {worker_id} claimed job {job.id} (attempt {job.attempts})")
+            process_job(job, worker_id)
+            queue.release(job.id)
+        except Exception as e:
+            logger.exception(e)
+            db.rollback()
+            stopping.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+        finally:
+            db.close()
+        if once:
+            return
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Process queued application package registrations.")
+    parser.add_argument("--once", action="store_true", help="process at most one job and exit")
+    args = parser.parse_args()
+    run(once=args.once)